@@ -3,12 +3,16 @@ Configuration file for Finance LLM Assistant
 Edit this file to customize tickers, system prompts, and API settings
 """
 
+import re
+from functools import lru_cache
+from typing import Optional
+
 # =============================================================================
 # YOUR STOCK TICKERS (BIST - Istanbul Stock Exchange)
 # =============================================================================
 # Format: Just the symbol - the app automatically adds .IS for Yahoo Finance
 
-TICKERS = [
+TICKERS = (
     "HALKB",    # Turkiye Halk Bankasi
     "TRENJ",    # Turk Traktor
     "TRMET",    # Turk Metal
@@ -19,10 +23,13 @@ TICKERS = [
     "TURSG",    # Turkiye Sigorta
     "VAKBN",    # Turkiye Vakiflar Bankasi
     "KRDMD",    # Kardemir
-]
+)
 
 # Yahoo Finance format (with .IS suffix)
-YAHOO_TICKERS = [f"{t}.IS" for t in TICKERS]
+YAHOO_TICKERS = tuple(f"{t}.IS" for t in TICKERS)
+
+# Bullet list inserted into the {tickers} placeholder (rendered once at import)
+TICKER_LIST_RENDERED = "\n".join(f"- {t}" for t in TICKERS)
 
 
 # =============================================================================
@@ -30,6 +37,7 @@ YAHOO_TICKERS = [f"{t}.IS" for t in TICKERS]
 # =============================================================================
 # Create your own system prompts here
 # Use {available_functions} placeholder to include API function documentation
+# and {tickers} for the ticker list; other braces are kept as written
 
 SYSTEM_PROMPTS = {
     "default": """You are a helpful financial assistant for Turkish stocks (BIST).
@@ -42,7 +50,7 @@ Available functions:
 
 To call a function, use:
 ```json
-{{"function": "function_name", "parameters": {{"param": "value"}}}}
+{"function": "function_name", "parameters": {"param": "value"}}
 ```
 
 Provide clear, helpful analysis. This is not financial advice.""",
@@ -57,7 +65,7 @@ Kullanilabilir fonksiyonlar:
 
 Veri cekmek icin:
 ```json
-{{"function": "fonksiyon_adi", "parameters": {{"parametre": "deger"}}}}
+{"function": "fonksiyon_adi", "parameters": {"parametre": "deger"}}
 ```
 
 Turkce yanit ver. Bu finansal tavsiye degildir.""",
@@ -70,7 +78,7 @@ Functions: {available_functions}
 
 Call format:
 ```json
-{{"function": "name", "parameters": {{}}}}
+{"function": "name", "parameters": {}}
 ```
 
 Focus on:
@@ -90,7 +98,7 @@ Functions: {available_functions}
 
 Data request:
 ```json
-{{"function": "name", "parameters": {{}}}}
+{"function": "name", "parameters": {}}
 ```
 
 Focus on:
@@ -133,8 +141,28 @@ API_PROVIDERS = {
 # HELPER FUNCTION
 # =============================================================================
 
-def get_prompt_with_tickers(prompt_name: str) -> str:
-    """Get a system prompt with tickers inserted"""
-    prompt = SYSTEM_PROMPTS.get(prompt_name, SYSTEM_PROMPTS["default"])
-    ticker_list = "\n".join(f"- {t}" for t in TICKERS)
-    return prompt.replace("{tickers}", ticker_list)
+_SLOT_PATTERN = re.compile(r"\{(tickers|available_functions)\}")
+
+
+@lru_cache(maxsize=32)
+def compile_prompt(template: str) -> tuple:
+    """Split a prompt once into literal text alternating with placeholder names"""
+    # re.split puts the captured slot names at the odd positions
+    return tuple(_SLOT_PATTERN.split(template))
+
+
+def render_prompt(template: str, available_functions: Optional[str] = None) -> str:
+    """Fill {tickers} and {available_functions} in a prompt; other braces (JSON examples) stay literal"""
+    # Without function docs the slot is kept, so FinanceLLM can still fill it in later
+    if available_functions is None:
+        available_functions = "{available_functions}"
+    slots = {"tickers": TICKER_LIST_RENDERED, "available_functions": available_functions}
+    return "".join(
+        slots[part] if i % 2 else part for i, part in enumerate(compile_prompt(template))
+    )
+
+
+def get_prompt_with_tickers(prompt_name: str, available_functions: Optional[str] = None) -> str:
+    """Get a system prompt with tickers (and optionally the function docs) inserted"""
+    # FinanceLLM renders prompts itself, so SYSTEM_PROMPTS entries can also be passed to it as-is
+    return render_prompt(SYSTEM_PROMPTS.get(prompt_name, SYSTEM_PROMPTS["default"]), available_functions)
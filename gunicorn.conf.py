@@ -0,0 +1,19 @@
+"""
+Gunicorn settings shared by every deployment (Procfile, Dockerfile, Railway, Render)
+Gunicorn loads this file from the working directory automatically.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Chat assistants live in process memory, so a single process keeps each session's
+# history reachable from every request. Threads give concurrency for the slow,
+# I/O-bound LLM and Yahoo calls; dashboard responses are prebuilt bytes.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+
+timeout = 180
+# Load the workbook and build the dashboard cache once, before forking
+preload_app = True
@@ -3,10 +3,71 @@ LLM Interface Module
 Handles communication with OpenAI-compatible APIs with customizable system prompts
 """
 
+import hashlib
 import json
 import re
-from typing import Optional, Callable
-from openai import OpenAI
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional, Callable, Union
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+from config import render_prompt
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# Inline function-call pattern, compiled once at import
+_INLINE_JSON_RE = re.compile(r'\{[^{}]*"function"[^{}]*\}')
+
+
+if orjson is not None:
+    _loads = orjson.loads
+elif ujson is not None:
+    _loads = ujson.loads
+else:
+    _loads = json.loads
+
+
+def _dumps(obj) -> str:
+    """Serialize to indented JSON with the fastest available encoder"""
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+        if ujson is not None:
+            return ujson.dumps(obj, indent=2, ensure_ascii=False)
+    except (TypeError, OverflowError):
+        # Types the fast encoders reject (e.g. numpy integers) go through stdlib
+        pass
+    return json.dumps(obj, indent=2, default=str)
+
+
+# One keep-alive connection pool shared by every OpenAI client in the process
+_HTTP_CLIENT = DefaultHttpxClient(
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=60)
+)
+
+# Replies to identical requests, shared by every FinanceLLM in the process
+_COMPLETION_CACHE_MAXSIZE = 512
+_COMPLETION_CACHE = OrderedDict()
+_COMPLETION_CACHE_LOCK = threading.Lock()
+
+
+def warm_connection(base_url: str):
+    """Open a pooled connection to the API host ahead of the first request"""
+    try:
+        _HTTP_CLIENT.head(base_url, timeout=5.0)
+    except Exception:
+        # Best effort only; the first real request will connect on its own
+        pass
 
 
 class FinanceLLM:
@@ -31,7 +92,7 @@ When users ask about stocks, you can call these functions:
 
 To call a function, respond with a JSON block like this:
 ```json
-{{"function": "function_name", "parameters": {{"param1": "value1"}}}}
+{"function": "function_name", "parameters": {"param1": "value1"}}
 ```
 
 After receiving function results, provide a clear, helpful analysis.
@@ -43,7 +104,9 @@ Always be informative but remind users that this is not financial advice."""
         base_url: str = "https://api.openai.com/v1",
         model: str = "gpt-4o-mini",
         system_prompt: Optional[str] = None,
-        available_functions: Optional[list] = None
+        available_functions: Optional[list] = None,
+        use_cache: bool = True,
+        max_turns: int = 20
     ):
         """
         Initialize the LLM interface
@@ -54,32 +117,55 @@ Always be informative but remind users that this is not financial advice."""
             model: Model name to use
             system_prompt: Custom system prompt (uses default if None)
             available_functions: List of available API functions to include in prompt
+            use_cache: Reuse replies to identical requests instead of calling the API again
+            max_turns: Number of recent user/assistant exchanges sent with each request
         """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.base_url = base_url
+        self._connect(api_key)
         self.model = model
+        self.use_cache = use_cache
+        self.max_history = 2 * max_turns
         self.available_functions = available_functions or []
+        # Messages sent to the API: a fixed system slot followed by the history
+        self._messages = [{"role": "system", "content": ""}]
         self.system_prompt = self._build_system_prompt(system_prompt)
-        self.conversation_history = []
+
+    @property
+    def system_prompt(self) -> str:
+        """The system prompt occupying the first message slot"""
+        return self._messages[0]["content"]
+
+    @system_prompt.setter
+    def system_prompt(self, prompt: str):
+        self._messages[0]["content"] = prompt
+        self._rehash()
+
+    @property
+    def conversation_history(self) -> list:
+        """Conversation messages after the system prompt"""
+        return self._messages[1:]
 
     def _build_system_prompt(self, custom_prompt: Optional[str] = None) -> str:
         """Build the system prompt with available functions"""
-        if custom_prompt:
-            # Replace placeholder if present, otherwise append function info
-            if "{available_functions}" in custom_prompt:
-                return custom_prompt.format(
-                    available_functions=json.dumps(self.available_functions, indent=2)
-                )
-            return custom_prompt
+        template = custom_prompt or self.DEFAULT_SYSTEM_PROMPT
+        return render_prompt(template, self._functions_json)
+
+    @property
+    def available_functions(self) -> list:
+        """Functions advertised to the LLM in the system prompt"""
+        return self._available_functions
 
-        return self.DEFAULT_SYSTEM_PROMPT.format(
-            available_functions=json.dumps(self.available_functions, indent=2)
-        )
+    @available_functions.setter
+    def available_functions(self, functions: list):
+        # Serialize once here instead of on every prompt rebuild
+        self._available_functions = functions
+        self._functions_json = _dumps(functions)
 
     def update_system_prompt(self, new_prompt: str):
         """Update the system prompt dynamically"""
-        self.system_prompt = self._build_system_prompt(new_prompt)
         # Clear conversation history when system prompt changes
-        self.conversation_history = []
+        del self._messages[1:]
+        self.system_prompt = self._build_system_prompt(new_prompt)
 
     def update_model(self, model: str):
         """Change the model being used"""
@@ -88,34 +174,154 @@ Always be informative but remind users that this is not financial advice."""
     def update_api_config(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         """Update API configuration"""
         if api_key or base_url:
-            current_key = api_key or self.client.api_key
-            current_url = base_url or str(self.client.base_url)
-            self.client = OpenAI(api_key=current_key, base_url=current_url)
+            self.base_url = base_url or self.base_url
+            self._connect(api_key or self.client.api_key)
+
+    def _connect(self, api_key: str):
+        """Create the client for api_key and self.base_url"""
+        self.client = OpenAI(api_key=api_key, base_url=self.base_url, http_client=_HTTP_CLIENT)
+        # Cached replies are only shared between clients holding the same API key,
+        # so a bad or different key never gets another user's completions
+        self._key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+
+    def _complete(
+        self,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+        stop_on_call: bool = False
+    ) -> str:
+        """Request a completion, reusing the cached reply to an identical request"""
+        model = self.model
+        request = {
+            "model": model,
+            "messages": self._messages,
+            "temperature": 0.7,
+            "max_tokens": 2000
+        }
+
+        key = None
+        if self.use_cache:
+            # The rolling history hash stands in for the full message payload
+            key = f"{self._key_hash}|{self.base_url}|{model}|{self.max_history}|{self._history_hash}"
+            with _COMPLETION_CACHE_LOCK:
+                content = _COMPLETION_CACHE.get(key)
+                if content is not None:
+                    _COMPLETION_CACHE.move_to_end(key)
+            if content is not None:
+                if on_token:
+                    on_token(content)
+                return content
+
+        if stream:
+            content = self._stream_completion(request, on_token, stop_on_call)
+        else:
+            response = self.client.chat.completions.create(**request)
+            content = response.choices[0].message.content
+
+        if key is not None and content is not None:
+            with _COMPLETION_CACHE_LOCK:
+                _COMPLETION_CACHE[key] = content
+                if len(_COMPLETION_CACHE) > _COMPLETION_CACHE_MAXSIZE:
+                    _COMPLETION_CACHE.popitem(last=False)
+        return content
+
+    def _stream_completion(
+        self,
+        request: dict,
+        on_token: Optional[Callable[[str], None]],
+        stop_on_call: bool
+    ) -> str:
+        """Stream a completion, optionally stopping once a fenced function call is complete"""
+        chunks = self.client.chat.completions.create(**request, stream=True)
+        parts = []
+        append = parts.append
+        try:
+            for chunk in chunks:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                append(text)
+                if on_token:
+                    on_token(text)
+
+                # Only a chunk with a backtick can close a ```json fence
+                if stop_on_call and "`" in text:
+                    buffer = "".join(parts)
+                    start = buffer.find("```json")
+                    if (start != -1 and buffer.find("```", start + 7) != -1
+                            and self.extract_function_call(buffer)):
+                        break
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        return "".join(parts)
+
+    def clear_cache(self):
+        """Drop all cached completions"""
+        with _COMPLETION_CACHE_LOCK:
+            _COMPLETION_CACHE.clear()
+
+    def _append_message(self, role: str, content: str):
+        """Append a message and fold it into the rolling history hash"""
+        self._messages.append({"role": role, "content": content})
+        self._update_hash(role, content)
+
+    def _update_hash(self, role: str, content: Optional[str]):
+        """Fold one length-prefixed message into the rolling hash"""
+        content = content or ""
+        self._hasher.update(f"{role}:{len(content)}:{content}".encode())
+        self._history_hash = self._hasher.hexdigest()
+
+    def _rehash(self):
+        """Rebuild the rolling hash from the system prompt and current history"""
+        self._hasher = hashlib.sha256()
+        for message in self._messages:
+            self._update_hash(message["role"], message["content"])
+
+    def _trim_history(self):
+        """Drop the oldest messages beyond max_history, keeping the system slot"""
+        messages = self._messages
+        excess = len(messages) - 1 - self.max_history
+        if excess <= 0:
+            return
+        # Never let the window open on a reply whose question was dropped
+        while excess + 1 < len(messages) and messages[excess + 1]["role"] != "user":
+            excess += 1
+        del messages[1:excess + 1]
 
     def extract_function_call(self, response: str) -> Optional[dict]:
         """Extract function call from LLM response"""
-        # Look for JSON blocks in the response
-        json_pattern = r'```json\s*(.*?)\s*```'
-        matches = re.findall(json_pattern, response, re.DOTALL)
-
-        for match in matches:
+        # Any valid call carries a "function" key; most replies are plain text
+        if '"function"' not in response:
+            return None
+
+        loads = _loads
+        find = response.find
+
+        # Look for ```json fenced blocks with a linear scan
+        pos = 0
+        while (start := find("```json", pos)) != -1:
+            end = find("```", start + 7)
+            if end == -1:
+                break
             try:
-                data = json.loads(match)
+                data = loads(response[start + 7:end].strip())
                 if "function" in data:
                     return data
-            except json.JSONDecodeError:
-                continue
+            except ValueError:
+                pass
+            pos = end + 3
 
         # Try to find inline JSON
         try:
-            # Look for JSON-like structure
-            inline_pattern = r'\{[^{}]*"function"[^{}]*\}'
-            inline_matches = re.findall(inline_pattern, response)
-            for match in inline_matches:
-                data = json.loads(match)
+            for match in _INLINE_JSON_RE.finditer(response):
+                data = loads(match.group(0))
                 if "function" in data:
                     return data
-        except (json.JSONDecodeError, TypeError):
+        except (ValueError, TypeError):
             pass
 
         return None
@@ -123,7 +329,9 @@ Always be informative but remind users that this is not financial advice."""
     def chat(
         self,
         user_message: str,
-        function_executor: Optional[Callable] = None
+        function_executor: Optional[Callable] = None,
+        stream: bool = True,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> str:
         """
         Send a message to the LLM and get a response
@@ -131,30 +339,22 @@ Always be informative but remind users that this is not financial advice."""
         Args:
             user_message: The user's input message
             function_executor: Callback to execute API functions
+            stream: Stream the completion and stop early on a complete function call
+            on_token: Callback receiving response text as it arrives
 
         Returns:
             The LLM's response (potentially after function execution)
         """
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
-
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            *self.conversation_history
-        ]
+        append_message = self._append_message
+        complete = self._complete
+        append_message("user", user_message)
+        self._trim_history()
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000
+            assistant_message = complete(
+                stream, on_token, stop_on_call=function_executor is not None
             )
 
-            assistant_message = response.choices[0].message.content
-
             # Check if the response contains a function call
             function_call = self.extract_function_call(assistant_message)
 
@@ -166,40 +366,20 @@ Always be informative but remind users that this is not financial advice."""
                 result = function_executor(func_name, **params)
 
                 # Add function result to conversation and get final response
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": assistant_message
-                })
-                self.conversation_history.append({
-                    "role": "user",
-                    "content": f"Function result:\n```json\n{json.dumps(result, indent=2)}\n```\nPlease analyze this data and provide a helpful response."
-                })
-
-                # Get final response with function result
-                messages = [
-                    {"role": "system", "content": self.system_prompt},
-                    *self.conversation_history
-                ]
-
-                final_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=2000
+                append_message("assistant", assistant_message)
+                append_message(
+                    "user",
+                    f"Function result:\n```json\n{_dumps(result)}\n```\nPlease analyze this data and provide a helpful response."
                 )
 
-                final_message = final_response.choices[0].message.content
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": final_message
-                })
+                if on_token:
+                    on_token("\n\n")
+                final_message = complete(stream, on_token)
+                append_message("assistant", final_message)
 
                 return final_message
 
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+            append_message("assistant", assistant_message)
 
             return assistant_message
 
@@ -209,11 +389,12 @@ Always be informative but remind users that this is not financial advice."""
 
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        del self._messages[1:]
+        self._rehash()
 
-    def get_conversation_history(self) -> list:
-        """Get the current conversation history"""
-        return self.conversation_history.copy()
+    def get_conversation_history(self) -> tuple:
+        """Get the current conversation history as a read-only sequence"""
+        return tuple(islice(self._messages, 1, None))
 
 
 class LLMConfigManager:
@@ -226,12 +407,12 @@ class LLMConfigManager:
     def add_config(
         self,
         name: str,
-        system_prompt: str,
+        system_prompt: Union[str, Callable[[], str]],
         model: str = "gpt-4o-mini",
         api_key: Optional[str] = None,
         base_url: str = "https://api.openai.com/v1"
     ):
-        """Add a new configuration"""
+        """Add a new configuration (system_prompt may be a factory called on first use)"""
         self.configs[name] = {
             "system_prompt": system_prompt,
             "model": model,
@@ -241,7 +422,11 @@ class LLMConfigManager:
 
     def get_config(self, name: str) -> Optional[dict]:
         """Get a configuration by name"""
-        return self.configs.get(name)
+        config = self.configs.get(name)
+        # Materialize lazily registered prompts once and keep the result
+        if config and callable(config["system_prompt"]):
+            config["system_prompt"] = config["system_prompt"]()
+        return config
 
     def list_configs(self) -> list:
         """List all configuration names"""
@@ -256,4 +441,4 @@ class LLMConfigManager:
 
     def get_active_config(self) -> Optional[dict]:
         """Get the currently active configuration"""
-        return self.configs.get(self.active_config)
+        return self.get_config(self.active_config)
@@ -5,30 +5,36 @@ A conversational AI assistant for Turkish stock market analysis (BIST)
 
 import os
 import json
+import sys
+from functools import cached_property
 from dotenv import load_dotenv
 from yahoo_finance import YahooFinanceAPI, execute_api_call
-from llm_interface import FinanceLLM, LLMConfigManager
+from llm_interface import FinanceLLM, LLMConfigManager, warm_connection
 
 # Load environment variables
 load_dotenv()
 
 
-class FinanceAssistant:
-    """Main application class for the Finance LLM Assistant"""
+# Slash commands shown in /help, in display order
+COMMANDS = (
+    ("/config <name>", "Change system prompt config"),
+    ("/configs", "List available configurations"),
+    ("/custom", "Enter custom system prompt"),
+    ("/model <name>", "Change model"),
+    ("/clear", "Clear conversation history"),
+    ("/portfolio", "Show portfolio summary"),
+    ("/help", "Show this help"),
+    ("/quit", "Exit"),
+)
 
-    def __init__(self):
-        self.api = YahooFinanceAPI()
-        self.llm = None
-        self.config_manager = LLMConfigManager()
-        self._setup_default_configs()
+HELP_TEXT = "\nCommands:\n" + "".join(f"  {usage:<16}- {desc}\n" for usage, desc in COMMANDS)
 
-    def _setup_default_configs(self):
-        """Setup default system prompt configurations"""
 
-        # Default analyst configuration
-        self.config_manager.add_config(
-            name="analyst",
-            system_prompt="""You are an expert financial analyst specializing in Turkish equities (BIST).
+# Default system prompts, materialized lazily by LLMConfigManager.get_config
+
+def _analyst_prompt() -> str:
+    """Default analyst configuration"""
+    return """You are an expert financial analyst specializing in Turkish equities (BIST).
 
 You have access to real-time data for these Turkish stocks:
 - HALKB (Turkiye Halk Bankasi) - Banking
@@ -47,17 +53,16 @@ Available API Functions:
 
 To fetch data, use this JSON format:
 ```json
-{{"function": "function_name", "parameters": {{"param": "value"}}}}
+{"function": "function_name", "parameters": {"param": "value"}}
 ```
 
 Provide detailed technical analysis when discussing stocks.
 Note: This is educational content, not financial advice."""
-        )
 
-        # Casual/beginner-friendly configuration
-        self.config_manager.add_config(
-            name="beginner",
-            system_prompt="""You are a friendly financial assistant who explains things in simple terms.
+
+def _beginner_prompt() -> str:
+    """Casual/beginner-friendly configuration"""
+    return """You are a friendly financial assistant who explains things in simple terms.
 
 You help users understand Turkish stocks in their portfolio:
 - HALKB, VAKBN (Banks)
@@ -72,17 +77,16 @@ Functions you can call:
 
 Use this format to get data:
 ```json
-{{"function": "function_name", "parameters": {{}}}}
+{"function": "function_name", "parameters": {}}
 ```
 
 Explain everything in simple, easy-to-understand language.
 Avoid jargon. This is for educational purposes only."""
-        )
 
-        # Turkish language configuration
-        self.config_manager.add_config(
-            name="turkish",
-            system_prompt="""Sen BIST hisse senetleri konusunda uzmanlasmis bir finansal asistansin.
+
+def _turkish_prompt() -> str:
+    """Turkish language configuration"""
+    return """Sen BIST hisse senetleri konusunda uzmanlasmis bir finansal asistansin.
 
 Portfoydeki hisseler:
 - HALKB (Turkiye Halk Bankasi)
@@ -101,16 +105,15 @@ Kullanilabilir fonksiyonlar:
 
 Veri cekmek icin:
 ```json
-{{"function": "fonksiyon_adi", "parameters": {{"parametre": "deger"}}}}
+{"function": "fonksiyon_adi", "parameters": {"parametre": "deger"}}
 ```
 
 Turkce yanit ver. Bu finansal tavsiye degildir, sadece egitim amaclidir."""
-        )
 
-        # Risk-focused configuration
-        self.config_manager.add_config(
-            name="risk_analyst",
-            system_prompt="""You are a risk management specialist analyzing Turkish equities.
+
+def _risk_analyst_prompt() -> str:
+    """Risk-focused configuration"""
+    return """You are a risk management specialist analyzing Turkish equities.
 
 Portfolio under analysis:
 - HALKB, VAKBN (Banking sector exposure)
@@ -126,7 +129,7 @@ API Functions:
 
 Data request format:
 ```json
-{{"function": "function_name", "parameters": {{}}}}
+{"function": "function_name", "parameters": {}}
 ```
 
 Focus on:
@@ -136,7 +139,39 @@ Focus on:
 - Correlation between holdings
 
 Always highlight potential risks. Not financial advice."""
-        )
+
+
+class FinanceAssistant:
+    """Main application class for the Finance LLM Assistant"""
+
+    def __init__(self):
+        self.api = YahooFinanceAPI()
+        self.llm = None
+        self.config_manager = LLMConfigManager()
+        self._setup_default_configs()
+        self._commands = {
+            "/quit": self._cmd_quit,
+            "/exit": self._cmd_quit,
+            "/config": self._cmd_config,
+            "/configs": self._cmd_configs,
+            "/custom": self._cmd_custom,
+            "/model": self._cmd_model,
+            "/clear": self._cmd_clear,
+            "/portfolio": self._cmd_portfolio,
+            "/help": self._cmd_help,
+        }
+
+    @cached_property
+    def available_functions(self) -> list:
+        """API functions advertised to the LLM, fetched on first use"""
+        return self.api.get_available_functions()
+
+    def _setup_default_configs(self):
+        """Register default system prompt configurations (prompts are built on first use)"""
+        self.config_manager.add_config(name="analyst", system_prompt=_analyst_prompt)
+        self.config_manager.add_config(name="beginner", system_prompt=_beginner_prompt)
+        self.config_manager.add_config(name="turkish", system_prompt=_turkish_prompt)
+        self.config_manager.add_config(name="risk_analyst", system_prompt=_risk_analyst_prompt)
 
     def initialize_llm(
         self,
@@ -155,7 +190,7 @@ Always highlight potential risks. Not financial advice."""
             base_url=base_url,
             model=model,
             system_prompt=system_prompt,
-            available_functions=self.api.get_available_functions()
+            available_functions=self.available_functions
         )
 
         print(f"[OK] LLM initialized with '{config_name}' configuration")
@@ -187,27 +222,19 @@ Always highlight potential risks. Not financial advice."""
         """Execute a Yahoo Finance API function"""
         return execute_api_call(self.api, function_name, **kwargs)
 
-    def chat(self, message: str) -> str:
-        """Send a message and get a response"""
+    def chat(self, message: str, on_token=None) -> str:
+        """Send a message and get a response, passing streamed text to on_token"""
         if not self.llm:
             return "Error: LLM not initialized. Call initialize_llm() first."
 
-        return self.llm.chat(message, self._execute_function)
+        return self.llm.chat(message, self._execute_function, on_token=on_token)
 
     def interactive_mode(self):
         """Run in interactive mode"""
         print("\n" + "="*60)
         print("    FINANCE LLM ASSISTANT - Turkish Stock Analysis (BIST)")
         print("="*60)
-        print("\nCommands:")
-        print("  /config <name>  - Change system prompt config")
-        print("  /configs        - List available configurations")
-        print("  /custom         - Enter custom system prompt")
-        print("  /model <name>   - Change model")
-        print("  /clear          - Clear conversation history")
-        print("  /portfolio      - Show portfolio summary")
-        print("  /help           - Show this help")
-        print("  /quit           - Exit")
+        sys.stdout.write(HELP_TEXT)
         print("\nYour tickers: HALKB, TRENJ, TRMET, TRALT, TCELL, THYAO,")
         print("              TTKOM, TURSG, VAKBN, KRDMD")
         print("-"*60)
@@ -224,10 +251,22 @@ Always highlight potential risks. Not financial advice."""
                     self._handle_command(user_input)
                     continue
 
-                # Regular chat
-                print("\nAssistant: ", end="")
-                response = self.chat(user_input)
-                print(response)
+                # Regular chat, printing tokens as they stream in
+                print("\nAssistant: ", end="", flush=True)
+                streamed = []
+
+                def show_token(text):
+                    streamed.append(text)
+                    print(text, end="", flush=True)
+
+                response = self.chat(user_input, on_token=show_token)
+                # The reply streams last, after any function-call JSON; errors and other
+                # replies that did not stream (even after a streamed call) are printed whole
+                text = "".join(streamed)
+                if text:
+                    print()
+                if not text.endswith(response):
+                    print(response)
 
             except KeyboardInterrupt:
                 print("\n\nGoodbye!")
@@ -241,80 +280,87 @@ Always highlight potential risks. Not financial advice."""
         cmd = parts[0].lower()
         arg = parts[1] if len(parts) > 1 else None
 
-        if cmd == "/quit" or cmd == "/exit":
-            print("Goodbye!")
-            exit(0)
-
-        elif cmd == "/config":
-            if arg:
-                self.change_config(arg)
-            else:
-                print("Usage: /config <name>")
-                print(f"Available: {self.config_manager.list_configs()}")
-
-        elif cmd == "/configs":
-            print("Available configurations:")
-            for name in self.config_manager.list_configs():
-                print(f"  - {name}")
-
-        elif cmd == "/custom":
-            print("Enter your custom system prompt (end with empty line):")
-            lines = []
-            while True:
-                line = input()
-                if not line:
-                    break
-                lines.append(line)
-            if lines:
-                custom_prompt = "\n".join(lines)
-                self.add_custom_config("custom", custom_prompt)
-                self.change_config("custom")
-
-        elif cmd == "/model":
-            if arg and self.llm:
-                self.llm.update_model(arg)
-                print(f"[OK] Model changed to: {arg}")
-            else:
-                print("Usage: /model <model_name>")
-
-        elif cmd == "/clear":
-            if self.llm:
-                self.llm.clear_history()
-                print("[OK] Conversation history cleared")
-
-        elif cmd == "/portfolio":
-            print("\nFetching portfolio data...")
-            summary = self.api.get_portfolio_summary()
-            print("\nPortfolio Summary:")
-            print(f"  Total stocks: {summary['total_stocks']}")
-            print(f"  Gainers: {summary['gainers']}")
-            print(f"  Losers: {summary['losers']}")
-            print("\nStocks:")
-            for stock in summary['stocks']:
-                if 'error' not in stock:
-                    change = stock.get('change_percent', 'N/A')
-                    ticker_name = stock['ticker'].replace('.IS', '')
-                    if change != 'N/A':
-                        symbol = "+" if change > 0 else ""
-                        print(f"  {ticker_name:8} {stock['price']:>10} {stock['currency']}  ({symbol}{change}%)")
-                    else:
-                        print(f"  {ticker_name:8} {stock['price']:>10} {stock['currency']}")
-
-        elif cmd == "/help":
-            print("\nCommands:")
-            print("  /config <name>  - Change system prompt config")
-            print("  /configs        - List available configurations")
-            print("  /custom         - Enter custom system prompt")
-            print("  /model <name>   - Change model")
-            print("  /clear          - Clear conversation history")
-            print("  /portfolio      - Show portfolio summary")
-            print("  /help           - Show this help")
-            print("  /quit           - Exit")
-
+        handler = self._commands.get(cmd)
+        if handler:
+            handler(arg)
         else:
             print(f"Unknown command: {cmd}")
             print("Type /help for available commands")
 
+    def _cmd_quit(self, arg):
+        """Exit the assistant"""
+        print("Goodbye!")
+        exit(0)
+
+    def _cmd_config(self, arg):
+        """Switch to a named configuration"""
+        if arg:
+            self.change_config(arg)
+        else:
+            print("Usage: /config <name>")
+            print(f"Available: {self.config_manager.list_configs()}")
+
+    def _cmd_configs(self, arg):
+        """List available configurations"""
+        print("Available configurations:")
+        for name in self.config_manager.list_configs():
+            print(f"  - {name}")
+
+    def _cmd_custom(self, arg):
+        """Read a multi-line custom system prompt and switch to it"""
+        print("Enter your custom system prompt (end with empty line):")
+        lines = []
+        while True:
+            line = input()
+            if not line:
+                break
+            lines.append(line)
+        if lines:
+            custom_prompt = "\n".join(lines)
+            self.add_custom_config("custom", custom_prompt)
+            self.change_config("custom")
+
+    def _cmd_model(self, arg):
+        """Change the model"""
+        if arg and self.llm:
+            self.llm.update_model(arg)
+            print(f"[OK] Model changed to: {arg}")
+        else:
+            print("Usage: /model <model_name>")
+
+    def _cmd_clear(self, arg):
+        """Clear conversation history"""
+        if self.llm:
+            self.llm.clear_history()
+            print("[OK] Conversation history cleared")
+
+    def _cmd_portfolio(self, arg):
+        """Show portfolio summary"""
+        print("\nFetching portfolio data...")
+        summary = self.api.get_portfolio_summary()
+        # Build the whole report and write it in one go
+        lines = [
+            "\nPortfolio Summary:",
+            f"  Total stocks: {summary['total_stocks']}",
+            f"  Gainers: {summary['gainers']}",
+            f"  Losers: {summary['losers']}",
+            "\nStocks:",
+        ]
+        for stock in summary['stocks']:
+            if 'error' not in stock:
+                change = stock.get('change_percent', 'N/A')
+                ticker_name = stock['ticker'].replace('.IS', '')
+                if change != 'N/A':
+                    symbol = "+" if change > 0 else ""
+                    lines.append(f"  {ticker_name:8} {stock['price']:>10} {stock['currency']}  ({symbol}{change}%)")
+                else:
+                    lines.append(f"  {ticker_name:8} {stock['price']:>10} {stock['currency']}")
+        sys.stdout.write("\n".join(lines) + "\n")
+
+    def _cmd_help(self, arg):
+        """Show the command list"""
+        sys.stdout.write(HELP_TEXT)
+
 
 def main():
     """Main entry point"""
@@ -343,6 +389,8 @@ def main():
         model=model,
         config_name="analyst"
     )
+    # Pay the TLS handshake now rather than on the first question
+    warm_connection(base_url)
 
     # Run interactive mode
     assistant.interactive_mode()
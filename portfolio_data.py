@@ -3,202 +3,346 @@ Portfolio Data Processing Module
 Reads TVF Portfolio Excel and computes all metrics for the dashboard
 """
 
+import os
+import hashlib
+import shutil
+import tempfile
+from importlib.util import find_spec
 import pandas as pd
 import numpy as np
 import json
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+
+# Workbook sheets loaded for the dashboard, keyed by their name in the data dict
+CORE_SHEETS = {
+    "overview": "Overview",
+    "dividends": "Dividends",
+    "append1": "Append1",
+    "usdtry": "USDTRY",
+    "xu100": "XU100",
+    "xu30": "XU30",
+    "xbank": "XBANK",
+    "overview_yahoo": "Overview_Yahoo",
+}
+
+# Individual stock sheets
+STOCK_SHEETS = (
+    "HALKB", "VAKBN", "TURSG", "TTKOM", "TRMET",
+    "TRENJ", "TRALT", "THYAO", "TCELL", "KRDMD"
+)
+
+# Known column types, so the parser skips inference on them
+SHEET_DTYPES = {
+    "USDTRY": {"Close": "float64"},
+    "XU100": {"Close": "float64"},
+    "XU30": {"Close": "float64"},
+    "XBANK": {"Close": "float64"},
+}
+
+# Columns the dashboard uses, for sheets that carry many more
+SHEET_COLUMNS = {
+    "Append1": ["Date", "USD Close", "Comp", "Cumulative Return %", "Indexed (Base 100)"],
+    "USDTRY": ["Date", "Close"],
+    "XU100": ["Date", "Close"],
+}
+
+# The Rust-backed calamine reader is several times faster than openpyxl; use it when installed
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") else "openpyxl"
+
+# Parsed sheets are kept here as Parquet, one directory per workbook version
+PARQUET_CACHE_DIR = os.environ.get("PORTFOLIO_CACHE_DIR", ".cache")
+
+
+def _workbook_key(excel_path):
+    """Cache key for a workbook: its absolute path and modification time"""
+    path = os.path.abspath(excel_path)
+    return path, os.path.getmtime(path)
 
 
 def load_portfolio_data(excel_path="TVF Portfolio V4.xlsx"):
-    """Load and process all portfolio data from Excel file"""
-    xls = pd.ExcelFile(excel_path)
-
-    overview = pd.read_excel(xls, "Overview")
-    dividends = pd.read_excel(xls, "Dividends")
-    append1 = pd.read_excel(xls, "Append1")
-    usdtry = pd.read_excel(xls, "USDTRY")
-    xu100 = pd.read_excel(xls, "XU100")
-    xu30 = pd.read_excel(xls, "XU30")
-    xbank = pd.read_excel(xls, "XBANK")
-    overview_yahoo = pd.read_excel(xls, "Overview_Yahoo")
-
-    data = {
-        "overview": overview,
-        "dividends": dividends,
-        "append1": append1,
-        "usdtry": usdtry,
-        "xu100": xu100,
-        "xu30": xu30,
-        "xbank": xbank,
-        "overview_yahoo": overview_yahoo,
-    }
+    """Load and process all portfolio data from Excel file (memoized until the file changes)"""
+    return _load_workbook(*_workbook_key(excel_path))
+
+
+@lru_cache(maxsize=4)
+def _load_workbook(excel_path, mtime):
+    """Parse every sheet the dashboard needs; mtime only keys the cache"""
+    cache_dir = _parquet_cache_dir(excel_path, mtime)
+    data = _read_parquet_cache(cache_dir)
+    if data is None:
+        # Normalized before caching so a fresh parse and a cache hit hand back identical frames
+        data = {key: _stringify_mixed_columns(df) for key, df in _read_excel_sheets(excel_path).items()}
+        _write_parquet_cache(cache_dir, data)
+    return data
 
-    # Load individual stock sheets
-    stock_sheets = [
-        "HALKB", "VAKBN", "TURSG", "TTKOM", "TRMET",
-        "TRENJ", "TRALT", "THYAO", "TCELL", "KRDMD"
+
+def _stringify_mixed_columns(df):
+    """Turn object columns mixing text and numbers (e.g. hand-typed dates) into text, which Arrow can store"""
+    mixed = [
+        col for col in df.columns
+        if df[col].dtype == object and df[col].dropna().map(type).nunique() > 1
     ]
-    for s in stock_sheets:
-        try:
-            data[s] = pd.read_excel(xls, s)
-        except Exception:
-            pass
+    if not mixed:
+        return df
+    return df.astype({col: str for col in mixed})
+
+
+def _read_excel_sheets(excel_path):
+    """Parse the dashboard sheets straight from the workbook"""
+    # Each worker keeps its own workbook handle; calamine's cannot be shared across threads
+    local = threading.local()
+
+    def read(sheet):
+        if not hasattr(local, "xls"):
+            local.xls = pd.ExcelFile(excel_path, engine=EXCEL_ENGINE)
+        return pd.read_excel(
+            local.xls, sheet, usecols=SHEET_COLUMNS.get(sheet), dtype=SHEET_DTYPES.get(sheet)
+        )
+
+    # Sheets are parsed concurrently
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        core = {key: pool.submit(read, sheet) for key, sheet in CORE_SHEETS.items()}
+        stocks = {s: pool.submit(read, s) for s in STOCK_SHEETS}
+
+        data = {key: future.result() for key, future in core.items()}
 
+        # Individual stock sheets are optional
+        for s, future in stocks.items():
+            try:
+                data[s] = future.result()
+            except Exception:
+                pass
+
+    return data
+
+
+def _parquet_cache_dir(excel_path, mtime):
+    """Cache directory for one version of a workbook"""
+    digest = hashlib.sha1(excel_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(PARQUET_CACHE_DIR, f"{digest}_{mtime!r}")
+
+
+def _read_parquet_cache(cache_dir):
+    """Load previously parsed sheets, or None if there is no usable cache"""
+    if not os.path.isdir(cache_dir):
+        return None
+    def read(key):
+        path = os.path.join(cache_dir, key)
+        if os.path.exists(path + ".parquet"):
+            return pd.read_parquet(path + ".parquet")
+        return None
+
+    try:
+        data = {key: read(key) for key in CORE_SHEETS}
+        if any(df is None for df in data.values()):
+            return None
+        for s in STOCK_SHEETS:
+            df = read(s)
+            if df is not None:
+                data[s] = df
+    except Exception:
+        return None
     return data
 
 
+def _write_parquet_cache(cache_dir, data):
+    """Best-effort save of parsed sheets; the Excel path still works without it"""
+    parent = os.path.dirname(cache_dir)
+    tmp_dir = None
+    try:
+        os.makedirs(parent, exist_ok=True)
+        # Write to a scratch directory and rename, so readers never see a partial cache
+        tmp_dir = tempfile.mkdtemp(dir=parent)
+        for key, df in data.items():
+            df.to_parquet(os.path.join(tmp_dir, key) + ".parquet", compression="zstd")
+        os.rename(tmp_dir, cache_dir)
+        tmp_dir = None
+    except Exception:
+        return
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Drop caches of older versions of the same workbook
+    prefix = os.path.basename(cache_dir).rsplit("_", 1)[0] + "_"
+    for name in os.listdir(parent):
+        if name.startswith(prefix) and name != os.path.basename(cache_dir):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+# Decimal places for each numeric column of the holdings table
+HOLDINGS_ROUNDING = {
+    "inv_price_try": 2, "cur_price_try": 2,
+    "inv_price_usd": 4, "cur_price_usd": 4,
+    "shareholding_pct": 1,
+    "investment_amount": 0, "current_value": 0, "dividends_usd": 0,
+    "total_return_usd": 2, "total_return_with_div": 2, "cagr": 2,
+    "eps": 2, "high52_try": 2, "low52_try": 2,
+    "return_1d": 2, "return_1w": 2, "return_1m": 2, "return_1y": 2, "ytd_return": 2,
+    "std_dev": 2,
+    "beta": 3, "sharpe": 3, "sortino": 3, "xu100_vol_corr": 3,
+}
+
+
 def compute_holdings_table(data):
     """Build holdings table with all metrics, properly audited"""
-    ov = data["overview"].copy()
-    rows = []
-
-    for _, r in ov.iterrows():
-        ticker = r["Ticker"].replace("IST:", "")
-        inv_usd = r["Investment Price USD"]
-        cur_usd = r["Current Price USD"]
-        inv_try = r["Investment Price TRY"]
-        cur_try = r["Current Price TRY"]
-        days = r["Day Elapsed"]
-        inv_amt = r["Investment Amount ($)"]
-        tvf_share_usd = r["TVF Share ($)"]
-        div_usd = r["Dividend (USD)"] if pd.notna(r["Dividend (USD)"]) else 0
-        shareholding = r["Shareholding Percentage"]
+    ov = data["overview"]
+    ticker = ov["Ticker"].str.replace("IST:", "", regex=False)
+    inv_usd = ov["Investment Price USD"]
+    cur_usd = ov["Current Price USD"]
+    days = ov["Day Elapsed"]
+    inv_amt = ov["Investment Amount ($)"]
+    tvf_share_usd = ov["TVF Share ($)"]
+    div_usd = ov["Dividend (USD)"].fillna(0)
+
+    # Whole-column arithmetic; np.where picks the fallback for unpriced rows
+    with np.errstate(divide="ignore", invalid="ignore"):
+        priced = (inv_usd > 0) & cur_usd.notna()
+        price_ratio = cur_usd / inv_usd
 
         # Total return in USD (price-only)
-        if inv_usd and inv_usd > 0 and pd.notna(cur_usd):
-            total_return_usd = (cur_usd / inv_usd - 1) * 100
-        else:
-            total_return_usd = 0
+        total_return_usd = np.where(priced, (price_ratio - 1) * 100, 0)
 
         # Total return including dividends (on TVF share basis)
-        if inv_amt and inv_amt > 0:
-            total_return_with_div = ((tvf_share_usd + div_usd - inv_amt) / inv_amt) * 100
-        else:
-            total_return_with_div = total_return_usd
+        total_return_with_div = np.where(
+            inv_amt > 0,
+            ((tvf_share_usd + div_usd - inv_amt) / inv_amt) * 100,
+            total_return_usd,
+        )
 
         # CAGR in USD
-        years = days / 365.25 if days and days > 0 else 1
-        if inv_usd and inv_usd > 0 and pd.notna(cur_usd) and years > 0:
-            cagr = ((cur_usd / inv_usd) ** (1 / years) - 1) * 100
-        else:
-            cagr = 0
-
-        row = {
-            "ticker": ticker,
-            "name": r.get("Name ", ticker),
-            "sector": r["Sector"],
-            "investment_date": str(r["Investment Date"]),
-            "days_elapsed": int(days) if pd.notna(days) else 0,
-            "inv_price_try": round(inv_try, 2) if pd.notna(inv_try) else 0,
-            "cur_price_try": round(cur_try, 2) if pd.notna(cur_try) else 0,
-            "inv_price_usd": round(inv_usd, 4) if pd.notna(inv_usd) else 0,
-            "cur_price_usd": round(cur_usd, 4) if pd.notna(cur_usd) else 0,
-            "shareholding_pct": round(shareholding * 100, 1) if pd.notna(shareholding) else 0,
-            "investment_amount": round(inv_amt, 0) if pd.notna(inv_amt) else 0,
-            "current_value": round(tvf_share_usd, 0) if pd.notna(tvf_share_usd) else 0,
-            "dividends_usd": round(div_usd, 0),
-            "total_return_usd": round(total_return_usd, 2),
-            "total_return_with_div": round(total_return_with_div, 2),
-            "cagr": round(cagr, 2),
-            "eps": round(r["EPS"], 2) if pd.notna(r["EPS"]) else None,
-            "high52_try": round(r["High52 (TRY)"], 2) if pd.notna(r["High52 (TRY)"]) else None,
-            "low52_try": round(r["Low52 (TRY)"], 2) if pd.notna(r["Low52 (TRY)"]) else None,
-            "return_1d": round(r["1D Return USD"] * 100, 2) if pd.notna(r["1D Return USD"]) else None,
-            "return_1w": round(r["1W Return USD"] * 100, 2) if pd.notna(r["1W Return USD"]) else None,
-            "return_1m": round(r["1M Return"] * 100, 2) if pd.notna(r["1M Return"]) else None,
-            "return_1y": round(r["1Y Return USD"] * 100, 2) if pd.notna(r["1Y Return USD"]) else None,
-            "ytd_return": round(r["YTD Return"] * 100, 2) if pd.notna(r["YTD Return"]) else None,
-            "std_dev": round(r["Standart Sapma"] * 100, 2) if pd.notna(r["Standart Sapma"]) else None,
-            "beta": round(r["Beta"], 3) if pd.notna(r["Beta"]) else None,
-            "sharpe": round(r["Sharpe"], 3) if pd.notna(r["Sharpe"]) else None,
-            "sortino": round(r["Sortino"], 3) if pd.notna(r["Sortino"]) else None,
-            "xu100_vol_corr": round(r["XU100 Hacim Korelasyonu"], 3) if pd.notna(r["XU100 Hacim Korelasyonu"]) else None,
-        }
-        rows.append(row)
-
-    return rows
-
-
-def compute_portfolio_totals(holdings):
-    """Compute portfolio-level totals"""
-    total_inv = sum(h["investment_amount"] for h in holdings)
-    total_cur = sum(h["current_value"] for h in holdings)
-    total_div = sum(h["dividends_usd"] for h in holdings)
+        years = np.where(days > 0, days / 365.25, 1)
+        cagr = np.where(priced, (price_ratio ** (1 / years) - 1) * 100, 0)
+
+    table = pd.DataFrame({
+        "ticker": ticker,
+        "name": ov["Name "] if "Name " in ov.columns else ticker,
+        "sector": ov["Sector"],
+        "investment_date": ov["Investment Date"].map(str),
+        "days_elapsed": days.fillna(0).astype(int),
+        "inv_price_try": ov["Investment Price TRY"].fillna(0),
+        "cur_price_try": ov["Current Price TRY"].fillna(0),
+        "inv_price_usd": inv_usd.fillna(0),
+        "cur_price_usd": cur_usd.fillna(0),
+        "shareholding_pct": (ov["Shareholding Percentage"] * 100).fillna(0),
+        "investment_amount": inv_amt.fillna(0),
+        "current_value": tvf_share_usd.fillna(0),
+        "dividends_usd": div_usd,
+        "total_return_usd": total_return_usd,
+        "total_return_with_div": total_return_with_div,
+        "cagr": cagr,
+        "eps": ov["EPS"],
+        "high52_try": ov["High52 (TRY)"],
+        "low52_try": ov["Low52 (TRY)"],
+        "return_1d": ov["1D Return USD"] * 100,
+        "return_1w": ov["1W Return USD"] * 100,
+        "return_1m": ov["1M Return"] * 100,
+        "return_1y": ov["1Y Return USD"] * 100,
+        "ytd_return": ov["YTD Return"] * 100,
+        "std_dev": ov["Standart Sapma"] * 100,
+        "beta": ov["Beta"],
+        "sharpe": ov["Sharpe"],
+        "sortino": ov["Sortino"],
+        "xu100_vol_corr": ov["XU100 Hacim Korelasyonu"],
+    }).round(HOLDINGS_ROUNDING)
+
+    # Optional metrics are reported as None rather than NaN
+    optional = table.columns[table.columns.get_loc("eps"):]
+    table[optional] = table[optional].astype(object).where(table[optional].notna(), None)
+
+    return table.to_dict("records")
+
+
+# Value-weighted portfolio metrics: (output key, holdings column, decimal places)
+WEIGHTED_SUMMARY_SPECS = (
+    ("portfolio_beta", "beta", 3),
+    ("portfolio_sharpe", "sharpe", 3),
+    ("portfolio_sortino", "sortino", 3),
+    ("portfolio_std", "std_dev", 2),
+)
+
+
+def _weighted_mean(values, weights):
+    """Weighted average over the rows where values is present, None if there are none"""
+    mask = ~np.isnan(values)
+    if not mask.any():
+        return None
+    return float(np.average(values[mask], weights=weights[mask]))
+
+
+def compute_portfolio_totals(holdings_df, total_value=None):
+    """Compute portfolio-level totals from the holdings DataFrame"""
+    df = holdings_df
+    total_inv = float(df["investment_amount"].sum())
+    total_cur = float(df["current_value"].sum()) if total_value is None else total_value
+    total_div = float(df["dividends_usd"].sum())
 
     if total_inv > 0:
         total_return = ((total_cur + total_div - total_inv) / total_inv) * 100
     else:
         total_return = 0
 
-    # Weighted average beta (by current value)
-    betas = [(h["beta"], h["current_value"]) for h in holdings if h["beta"] is not None]
-    if betas:
-        portfolio_beta = sum(b * w for b, w in betas) / sum(w for _, w in betas)
-    else:
-        portfolio_beta = None
-
-    # Weighted average sharpe
-    sharpes = [(h["sharpe"], h["current_value"]) for h in holdings if h["sharpe"] is not None]
-    if sharpes:
-        portfolio_sharpe = sum(s * w for s, w in sharpes) / sum(w for _, w in sharpes)
-    else:
-        portfolio_sharpe = None
-
-    # Weighted average sortino
-    sortinos = [(h["sortino"], h["current_value"]) for h in holdings if h["sortino"] is not None]
-    if sortinos:
-        portfolio_sortino = sum(s * w for s, w in sortinos) / sum(w for _, w in sortinos)
-    else:
-        portfolio_sortino = None
-
-    # Weighted std dev
-    stds = [(h["std_dev"], h["current_value"]) for h in holdings if h["std_dev"] is not None]
-    if stds:
-        portfolio_std = sum(s * w for s, w in stds) / sum(w for _, w in stds)
-    else:
-        portfolio_std = None
-
-    return {
+    # Weighted averages by current value
+    weights = df["current_value"].to_numpy(dtype=float)
+    totals = {
         "total_investment": round(total_inv, 0),
         "total_current_value": round(total_cur, 0),
         "total_dividends": round(total_div, 0),
         "total_gain": round(total_cur + total_div - total_inv, 0),
         "total_return_pct": round(total_return, 2),
-        "portfolio_beta": round(portfolio_beta, 3) if portfolio_beta else None,
-        "portfolio_sharpe": round(portfolio_sharpe, 3) if portfolio_sharpe else None,
-        "portfolio_sortino": round(portfolio_sortino, 3) if portfolio_sortino else None,
-        "portfolio_std": round(portfolio_std, 2) if portfolio_std else None,
-        "num_holdings": len(holdings),
     }
+    for name, column, ndigits in WEIGHTED_SUMMARY_SPECS:
+        value = _weighted_mean(df[column].to_numpy(dtype=float), weights)
+        totals[name] = round(value, ndigits) if value else None
+    totals["num_holdings"] = len(df)
+    totals["num_sectors"] = int(df["sector"].nunique(dropna=False)) if "sector" in df else 0
+
+    # Averages shown on the dashboard cards and table footer: missing values count as zero
+    for column in ("cagr", "beta", "sharpe", "sortino"):
+        values = np.nan_to_num(df[column].to_numpy(dtype=float))
+        totals[f"w_{column}"] = float(values @ weights / total_cur) if total_cur > 0 else 0.0
+
+    return totals
+
+
+def _format_dates(dates):
+    """Format a date column as YYYY-MM-DD strings, None where missing"""
+    parsed = pd.to_datetime(dates, errors="coerce")
+    return parsed.dt.strftime("%Y-%m-%d").astype(object).where(parsed.notna(), None).tolist()
+
+
+def _rounded_list(values, ndigits):
+    """Round a numeric column to a list, None where missing"""
+    return values.round(ndigits).astype(object).where(values.notna(), None).tolist()
+
+
+def _group_by_comp(app1):
+    """Split Append1 into per-Comp frames sorted by date, in order of first appearance"""
+    groups = dict(tuple(app1.sort_values("Date").groupby("Comp", sort=False)))
+    return {comp: groups[comp] for comp in app1["Comp"].unique() if comp in groups}
+
+
+def _comp_groups(data):
+    """Append1 split by Comp, computed once and kept on the (cached) data dict"""
+    groups = data.get("append1_by_comp")
+    if groups is None:
+        groups = data["append1_by_comp"] = _group_by_comp(data["append1"])
+    return groups
 
 
 def compute_indexed_performance(data):
     """Get indexed performance data for charts"""
-    app1 = data["append1"]
     result = {}
 
-    stocks = app1["Comp"].unique()
-    for comp in stocks:
-        df = app1[app1["Comp"] == comp].sort_values("Date").copy()
-        if len(df) == 0:
-            continue
-
-        dates = []
-        for d in df["Date"]:
-            if pd.isna(d):
-                dates.append(None)
-            elif isinstance(d, str):
-                dates.append(d)
-            elif isinstance(d, (pd.Timestamp, datetime)):
-                dates.append(d.strftime("%Y-%m-%d"))
-            else:
-                dates.append(str(d))
-
+    for comp, df in _comp_groups(data).items():
         result[comp] = {
-            "dates": dates,
-            "indexed": [round(v, 2) if pd.notna(v) else None for v in df["Indexed (Base 100)"].values],
-            "cumulative_return": [round(v, 2) if pd.notna(v) else None for v in df["Cumulative Return %"].values],
-            "usd_close": [round(v, 4) if pd.notna(v) else None for v in df["USD Close"].values],
+            "dates": _format_dates(df["Date"]),
+            "indexed": _rounded_list(df["Indexed (Base 100)"], 2),
+            "cumulative_return": _rounded_list(df["Cumulative Return %"], 2),
+            "usd_close": _rounded_list(df["USD Close"], 4),
         }
 
     return result
@@ -206,45 +350,26 @@ def compute_indexed_performance(data):
 
 def compute_drawdown(data):
     """Compute drawdown series for each stock"""
-    app1 = data["append1"]
     result = {}
 
-    stocks = [c for c in app1["Comp"].unique() if c not in ("XU30", "XBANK", "XU100")]
-    for comp in stocks:
-        df = app1[app1["Comp"] == comp].sort_values("Date").copy()
-        if len(df) == 0:
+    for comp, df in _comp_groups(data).items():
+        if comp in ("XU30", "XBANK", "XU100"):
             continue
 
-        prices = df["USD Close"].values
-        dates = []
-        for d in df["Date"]:
-            if pd.isna(d):
-                dates.append(None)
-            elif isinstance(d, str):
-                dates.append(d)
-            elif isinstance(d, (pd.Timestamp, datetime)):
-                dates.append(d.strftime("%Y-%m-%d"))
-            else:
-                dates.append(str(d))
-
-        # Compute drawdown
-        peak = prices[0]
-        drawdowns = []
-        for p in prices:
-            if pd.notna(p) and p > peak:
-                peak = p
-            if pd.notna(p) and peak > 0:
-                dd = ((p - peak) / peak) * 100
-                drawdowns.append(round(dd, 2))
-            else:
-                drawdowns.append(0)
-
-        max_dd = min(drawdowns) if drawdowns else 0
+        prices = df["USD Close"].to_numpy(dtype=float)
+
+        # Compute drawdown against the running peak (NaN prices never raise it)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            peak = np.fmax.accumulate(prices)
+            dd = np.where(~np.isnan(prices) & (peak > 0), (prices - peak) / peak * 100, 0)
+        dd = np.round(dd, 2)
+        drawdowns = dd.tolist()
+        max_dd = float(dd.min())
 
         result[comp] = {
-            "dates": dates,
+            "dates": _format_dates(df["Date"]),
             "drawdown": drawdowns,
-            "max_drawdown": round(max_dd, 2),
+            "max_drawdown": max_dd,
         }
 
     return result
@@ -252,18 +377,13 @@ def compute_drawdown(data):
 
 def compute_xu100_usd(data):
     """Compute XU100 in USD terms"""
-    xu100 = data["xu100"].copy()
-    usdtry = data["usdtry"].copy()
-
-    # Convert Excel serial dates to datetime for matching
-    # XU100 dates are Excel serial numbers with fractional part
-    xu100_close = xu100["Close"].values
-    usdtry_close = usdtry["Close"].values
+    xu100_close = data["xu100"]["Close"]
+    usdtry_close = data["usdtry"]["Close"]
 
     # Simple approach: if lengths align reasonably, use last available
     # Get the latest values
-    latest_xu100 = xu100_close[-1] if len(xu100_close) > 0 else 0
-    latest_usdtry = usdtry_close[-1] if len(usdtry_close) > 0 else 1
+    latest_xu100 = xu100_close.iat[-1] if len(xu100_close) > 0 else 0
+    latest_usdtry = usdtry_close.iat[-1] if len(usdtry_close) > 0 else 1
 
     xu100_usd = latest_xu100 / latest_usdtry if latest_usdtry > 0 else 0
 
@@ -274,86 +394,200 @@ def compute_xu100_usd(data):
     }
 
 
-def compute_risk_decomposition(holdings):
-    """Compute risk contribution by sector and stock"""
-    sectors = {}
-    total_value = sum(h["current_value"] for h in holdings)
+def compute_risk_decomposition(hdf, total_value=None):
+    """Compute risk contribution by sector and stock from the holdings DataFrame"""
+    cv = hdf["current_value"].to_numpy(dtype=float)
+    if total_value is None:
+        total_value = float(cv.sum())
 
-    for h in holdings:
-        sector = h["sector"]
-        if sector not in sectors:
-            sectors[sector] = {
-                "sector": sector,
-                "stocks": [],
-                "total_value": 0,
-                "weight": 0,
-            }
-        sectors[sector]["stocks"].append(h["ticker"])
-        sectors[sector]["total_value"] += h["current_value"]
-
-    for s in sectors.values():
-        s["weight"] = round((s["total_value"] / total_value) * 100, 2) if total_value > 0 else 0
+    sectors = hdf.groupby("sector", sort=False, dropna=False).agg(
+        stocks=("ticker", list),
+        total_value=("current_value", "sum"),
+    ).reset_index()
+    sectors["weight"] = (sectors["total_value"] / total_value * 100).round(2) if total_value > 0 else 0
 
     # Stock-level weights
-    stock_weights = []
-    for h in holdings:
-        w = (h["current_value"] / total_value * 100) if total_value > 0 else 0
-        vol_contribution = w * (h["std_dev"] / 100 if h["std_dev"] else 0) / 100
-        stock_weights.append({
-            "ticker": h["ticker"],
-            "sector": h["sector"],
-            "weight": round(w, 2),
-            "beta": h["beta"],
-            "std_dev": h["std_dev"],
-            "vol_contribution": round(vol_contribution * 100, 3),
-        })
+    w = cv / total_value * 100 if total_value > 0 else np.zeros_like(cv)
+    std = hdf["std_dev"].to_numpy(dtype=float)
+    vol_contribution = w * np.nan_to_num(std / 100) / 100
+
+    # beta and std_dev pass through as-is, keeping None for missing values
+    stocks = hdf[["ticker", "sector"]].assign(
+        weight=np.round(w, 2),
+        beta=hdf["beta"].astype(object).where(hdf["beta"].notna(), None),
+        std_dev=hdf["std_dev"].astype(object).where(hdf["std_dev"].notna(), None),
+        vol_contribution=np.round(vol_contribution * 100, 3),
+    )
 
     return {
-        "sectors": list(sectors.values()),
-        "stocks": stock_weights,
+        "sectors": sectors[["sector", "stocks", "total_value", "weight"]].to_dict("records"),
+        "stocks": stocks.to_dict("records"),
     }
 
 
-def compute_sector_summary(holdings):
-    """Aggregate returns by sector"""
-    sectors = {}
+# Sectors above this share of portfolio value are flagged as concentrated
+SECTOR_CONCENTRATION_PCT = 30
+
+
+def compute_sector_summary(hdf, total_value=None):
+    """Aggregate returns and portfolio weight by sector from the holdings DataFrame"""
+    if total_value is None:
+        total_value = float(hdf["current_value"].sum())
+    agg = hdf.groupby("sector", sort=False, dropna=False).agg(
+        stocks=("ticker", list),
+        total_inv=("investment_amount", "sum"),
+        total_cur=("current_value", "sum"),
+        total_div=("dividends_usd", "sum"),
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(
+            agg["total_inv"] > 0,
+            (agg["total_cur"] + agg["total_div"] - agg["total_inv"]) / agg["total_inv"] * 100,
+            0,
+        )
+    weight = agg["total_cur"].to_numpy(dtype=float) / total_value * 100 if total_value > 0 else np.zeros(len(agg))
+
+    result = pd.DataFrame({
+        "sector": agg.index,
+        "stocks": agg["stocks"].to_numpy(),
+        "total_investment": agg["total_inv"].round(0).to_numpy(),
+        "total_current_value": agg["total_cur"].round(0).to_numpy(),
+        "total_dividends": agg["total_div"].round(0).to_numpy(),
+        "return_pct": np.round(ret, 2),
+        "weight_pct": np.round(weight, 2),
+        "over_concentrated": weight > SECTOR_CONCENTRATION_PCT,
+    })
+    return result.to_dict("records")
+
+
+def _fmt_amount(n):
+    """Abbreviate a dollar amount the way the dashboard's fmtB does"""
+    if abs(n) >= 1e9:
+        return f"{n / 1e9:.2f}B"
+    if abs(n) >= 1e6:
+        return f"{n / 1e6:.1f}M"
+    if abs(n) >= 1e3:
+        return f"{n / 1e3:.0f}K"
+    return f"{n:.0f}"
+
+
+def compute_insights(holdings, sector_summary, totals):
+    """Key insight cards, tagged with ticker/sector so the page can filter without recomputing"""
+    insights = []
+
     for h in holdings:
-        s = h["sector"]
-        if s not in sectors:
-            sectors[s] = {"sector": s, "stocks": [], "total_inv": 0, "total_cur": 0, "total_div": 0}
-        sectors[s]["stocks"].append(h["ticker"])
-        sectors[s]["total_inv"] += h["investment_amount"]
-        sectors[s]["total_cur"] += h["current_value"]
-        sectors[s]["total_div"] += h["dividends_usd"]
-
-    result = []
-    for s in sectors.values():
-        if s["total_inv"] > 0:
-            ret = ((s["total_cur"] + s["total_div"] - s["total_inv"]) / s["total_inv"]) * 100
-        else:
-            ret = 0
-        result.append({
-            "sector": s["sector"],
-            "stocks": s["stocks"],
-            "total_investment": round(s["total_inv"], 0),
-            "total_current_value": round(s["total_cur"], 0),
-            "total_dividends": round(s["total_div"], 0),
-            "return_pct": round(ret, 2),
+        ticker, sector = h["ticker"], h["sector"]
+        total_return, beta, sharpe = h["total_return_with_div"], h["beta"], h["sharpe"]
+
+        def add(kind, title, text):
+            insights.append({"type": kind, "title": title, "text": text, "ticker": ticker, "sector": sector})
+
+        if total_return > 200:
+            dividends = f"Dividends contributed ${_fmt_amount(h['dividends_usd'])}." if h["dividends_usd"] > 0 else ""
+            add("success", f"{ticker} - Strong Performer",
+                f"{ticker} has delivered {total_return:.1f}% total return (USD) with a CAGR of {h['cagr']:.1f}%. {dividends}")
+        if total_return < 0:
+            add("danger", f"{ticker} - Negative Return",
+                f"{ticker} is down {abs(total_return):.1f}% in USD terms since investment on {h['investment_date']}. "
+                "Consider reviewing the investment thesis.")
+        if beta is not None and beta > 1.15:
+            add("warning", f"{ticker} - High Beta ({beta:.2f})",
+                f"{ticker} has a beta of {beta:.2f}, indicating higher sensitivity to market movements. "
+                "This position amplifies both gains and losses relative to XU100.")
+        if sharpe is not None and sharpe < 0:
+            return_1y = f"{h['return_1y']:.1f}%" if h["return_1y"] is not None else "N/A"
+            add("danger", f"{ticker} - Negative Risk-Adjusted Return",
+                f"{ticker} has a Sharpe ratio of {sharpe:.2f}, indicating returns have not compensated for the risk taken. "
+                f"The 1Y USD return is {return_1y}.")
+        if sharpe is not None and sharpe > 2:
+            add("success", f"{ticker} - Excellent Risk-Adjusted Return",
+                f"{ticker} has a Sharpe ratio of {sharpe:.2f}, well above the 1.0 threshold. Strong risk-adjusted performance.")
+
+    # Sector concentration; tagged by sector only, so stock filters skip it
+    for s in sector_summary:
+        if s["over_concentrated"]:
+            insights.append({
+                "type": "warning", "title": f"Sector Concentration: {s['sector']}",
+                "text": f"{s['sector']} represents {s['weight_pct']:.1f}% of portfolio value ({', '.join(s['stocks'])}). "
+                        "Consider diversification to reduce sector-specific risk.",
+                "sector": s["sector"],
+            })
+
+    # Portfolio level; untagged, so only the unfiltered view shows it
+    beta, sharpe, sortino = totals["portfolio_beta"], totals["portfolio_sharpe"], totals["portfolio_sortino"]
+    if beta is not None and beta > 1.05:
+        insights.append({
+            "type": "warning", "title": "Portfolio Tilts Aggressive",
+            "text": f"Portfolio beta of {beta:.2f} indicates above-market risk. "
+                    "In a downturn, the portfolio is expected to decline more than XU100.",
+        })
+    if sharpe is not None and sharpe > 0.5:
+        sortino_text = f"{sortino:.2f}" if sortino else "N/A"
+        insights.append({
+            "type": "success", "title": "Positive Risk-Adjusted Returns",
+            "text": f"Portfolio Sharpe ratio of {sharpe:.2f} suggests adequate compensation for risk taken. "
+                    f"Sortino of {sortino_text} indicates limited downside deviation.",
         })
 
-    return result
+    return insights
+
+
+EXPORT_HEADERS = (
+    "Ticker", "Sector", "Investment Date", "Inv Price USD", "Cur Price USD", "TVF Share %",
+    "Investment Amount", "Current Value", "Dividends", "Return USD %", "CAGR %", "Beta", "Sharpe", "Sortino",
+)
+
+
+def _tsv_cell(value):
+    """Format a cell the way JavaScript's Array.join would (no trailing .0, blanks for missing)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def build_export_tsv(holdings, totals):
+    """Tab-separated holdings table with a total row, ready to paste into a spreadsheet"""
+    rows = [EXPORT_HEADERS]
+    for h in holdings:
+        rows.append((
+            h["ticker"], h["sector"], h["investment_date"], h["inv_price_usd"], h["cur_price_usd"],
+            h["shareholding_pct"], round(h["investment_amount"]), round(h["current_value"]),
+            round(h["dividends_usd"]), h["total_return_with_div"], h["cagr"],
+            h["beta"] or "", h["sharpe"] or "", h["sortino"] or "",
+        ))
+    rows.append((
+        "TOTAL", "", "", "", "", "", round(totals["total_investment"]), round(totals["total_current_value"]),
+        round(totals["total_dividends"]), totals["total_return_pct"],
+        "", totals["portfolio_beta"] or "", totals["portfolio_sharpe"] or "", totals["portfolio_sortino"] or "",
+    ))
+    return "".join("\t".join(_tsv_cell(v) for v in row) + "\n" for row in rows)
 
 
 def get_all_dashboard_data(excel_path="TVF Portfolio V4.xlsx"):
     """Main function to get all dashboard data as JSON-serializable dict"""
-    data = load_portfolio_data(excel_path)
+    # The cached dict is shared between callers; treat it as read-only
+    return _build_dashboard_data(*_workbook_key(excel_path))
+
+
+@lru_cache(maxsize=4)
+def _build_dashboard_data(excel_path, mtime):
+    """Compute the dashboard payload; cached until the workbook's mtime changes"""
+    data = _load_workbook(excel_path, mtime)
     holdings = compute_holdings_table(data)
-    totals = compute_portfolio_totals(holdings)
+    # Column-wise view of the holdings, shared by the aggregate computations
+    holdings_df = pd.DataFrame(holdings)
+    total_value = float(holdings_df["current_value"].sum())
+    totals = compute_portfolio_totals(holdings_df, total_value)
     indexed = compute_indexed_performance(data)
     drawdown = compute_drawdown(data)
     xu100_usd = compute_xu100_usd(data)
-    risk = compute_risk_decomposition(holdings)
-    sectors = compute_sector_summary(holdings)
+    risk = compute_risk_decomposition(holdings_df, total_value)
+    sectors = compute_sector_summary(holdings_df, total_value)
+    insights = compute_insights(holdings, sectors, totals)
+    export_tsv = build_export_tsv(holdings, totals)
 
     return {
         "holdings": holdings,
@@ -363,6 +597,8 @@ def get_all_dashboard_data(excel_path="TVF Portfolio V4.xlsx"):
         "xu100_usd": xu100_usd,
         "risk_decomposition": risk,
         "sector_summary": sectors,
+        "insights": insights,
+        "export_tsv": export_tsv,
     }
 
 
@@ -0,0 +1,620 @@
+// ==================== DATA ====================
+// Requested right away so the download overlaps parsing the rest of the page
+let D = null;
+function fetchDashboardData() {
+    return fetch('/api/dashboard.json').then(r => {
+        if (!r.ok) throw new Error('HTTP ' + r.status);
+        return r.json();
+    });
+}
+let dashboardData = fetchDashboardData();
+
+// ==================== ELEMENTS ====================
+// Looked up once at startup; renderers use EL.<id> instead of repeated getElementById calls
+const EL_IDS = [
+    'chatApiKey', 'chatInput', 'chatMessages', 'chatModel', 'chatProvider', 'chatStatus',
+    'drawdownChart', 'drawdownSection', 'drawdownToggle', 'holdingsBody', 'indexedChart',
+    'insightFilters', 'insightsContainer', 'riskBody', 'riskPieChart', 'settingsPanel', 'usdtry',
+    'vBeta', 'vCAGR', 'vGain', 'vGainSub', 'vHoldings', 'vReturn', 'vReturnSub', 'vSectors',
+    'vSharpe', 'vSortino', 'vStdDev', 'xu100Try', 'xu100Usd'
+];
+let EL = {};
+
+// ==================== INIT ====================
+document.addEventListener('DOMContentLoaded', () => {
+    EL = Object.fromEntries(EL_IDS.map(id => [id, document.getElementById(id)]));
+    initDashboard();
+});
+
+async function initDashboard() {
+    try {
+        D = await dashboardData;
+    } catch (e) {
+        showLoadError(e);
+        return;
+    }
+    renderHeader();
+    renderCards();
+    renderHoldings();
+    renderInsights();
+    renderWhenVisible(new Map([
+        [EL.indexedChart, renderIndexedChart],
+        [EL.drawdownChart, renderDrawdownChart],
+        [EL.riskPieChart, renderRiskDecomposition],
+    ]));
+}
+
+// A failed data request leaves a message with a retry button instead of a blank page
+function showLoadError(err) {
+    const banner = document.createElement('div');
+    banner.className = 'load-error';
+    const retry = document.createElement('button');
+    retry.className = 'send-btn';
+    retry.textContent = 'Retry';
+    retry.onclick = () => {
+        banner.remove();
+        dashboardData = fetchDashboardData();
+        initDashboard();
+    };
+    banner.append('Could not load portfolio data (' + err.message + '). ', retry);
+    document.getElementById('app').prepend(banner);
+}
+
+// Charts are built when their canvas nears the viewport, keeping canvas setup off the first paint.
+// A hidden section (e.g. drawdown toggled off) renders once it is shown again.
+function renderWhenVisible(pending) {
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(e => {
+            if (!e.isIntersecting) return;
+            observer.unobserve(e.target);
+            pending.get(e.target)();
+        });
+    }, {rootMargin: '200px'});
+    pending.forEach((render, el) => observer.observe(el));
+}
+
+// ==================== HEADER ====================
+function renderHeader() {
+    const xu = D.xu100_usd;
+    EL.xu100Try.textContent = FMT_NUMBER.format(xu.xu100_try);
+    EL.xu100Usd.textContent = FMT_NUMBER.format(xu.xu100_usd);
+    EL.usdtry.textContent = xu.usdtry.toFixed(2);
+}
+
+// ==================== CARDS ====================
+function renderCards() {
+    const t = D.totals;
+    const retEl = EL.vReturn;
+    retEl.textContent = t.total_return_pct.toFixed(1) + '%';
+    retEl.className = 'card-value ' + (t.total_return_pct >= 0 ? 'positive' : 'negative');
+    EL.vReturnSub.textContent = 'Invested $' + fmtB(t.total_investment);
+
+    EL.vGain.textContent = '$' + fmtB(t.total_gain);
+    EL.vGainSub.textContent = 'Dividends: $' + fmtB(t.total_dividends);
+
+    // Weighted avg CAGR
+    const avgCagr = t.w_cagr;
+    const cagrEl = EL.vCAGR;
+    cagrEl.textContent = avgCagr.toFixed(1) + '%';
+    cagrEl.className = 'card-value ' + (avgCagr >= 0 ? 'positive' : 'negative');
+
+    const betaEl = EL.vBeta;
+    betaEl.textContent = t.portfolio_beta !== null ? t.portfolio_beta.toFixed(2) : 'N/A';
+
+    const sharpeEl = EL.vSharpe;
+    if (t.portfolio_sharpe !== null) {
+        sharpeEl.textContent = t.portfolio_sharpe.toFixed(2);
+        sharpeEl.className = 'card-value ' + (t.portfolio_sharpe >= 1 ? 'positive' : t.portfolio_sharpe >= 0 ? 'neutral' : 'negative');
+    }
+
+    const sortinoEl = EL.vSortino;
+    if (t.portfolio_sortino !== null) {
+        sortinoEl.textContent = t.portfolio_sortino.toFixed(2);
+        sortinoEl.className = 'card-value ' + (t.portfolio_sortino >= 1 ? 'positive' : t.portfolio_sortino >= 0 ? 'neutral' : 'negative');
+    }
+
+    EL.vStdDev.textContent = t.portfolio_std !== null ? t.portfolio_std.toFixed(1) + '%' : 'N/A';
+    EL.vHoldings.textContent = t.num_holdings;
+
+    EL.vSectors.textContent = D.totals.num_sectors + ' sectors';
+}
+
+// ==================== HOLDINGS TABLE ====================
+const HOLDINGS_PAGE_SIZE = 50;
+
+// Build a table row from [value, className] cells; values are set as text, or appended if they are elements
+function tableRow(cells, rowClass) {
+    const tr = document.createElement('tr');
+    if (rowClass) tr.className = rowClass;
+    for (const [value, cls] of cells) {
+        const td = document.createElement('td');
+        if (cls) td.className = cls;
+        if (typeof value === 'object') td.appendChild(value);
+        else td.textContent = value;
+        tr.appendChild(td);
+    }
+    return tr;
+}
+
+function strongText(text, color) {
+    const el = document.createElement('strong');
+    if (color) el.style.color = color;
+    el.textContent = text;
+    return el;
+}
+
+const signClass = v => v >= 0 ? 'positive' : 'negative';
+const ratioClass = v => (v||0) >= 1 ? 'positive' : (v||0) < 0 ? 'negative' : '';
+
+function holdingRow(h) {
+    return tableRow([
+        [strongText(h.ticker, 'var(--accent)')],
+        [h.sector],
+        [h.investment_date],
+        ['$' + h.inv_price_usd.toFixed(3)],
+        ['$' + h.cur_price_usd.toFixed(3)],
+        [h.shareholding_pct.toFixed(1) + '%'],
+        ['$' + fmtB(h.investment_amount)],
+        ['$' + fmtB(h.current_value)],
+        ['$' + fmtB(h.dividends_usd)],
+        [h.total_return_with_div.toFixed(1) + '%', signClass(h.total_return_with_div)],
+        [h.cagr.toFixed(1) + '%', signClass(h.cagr)],
+        [h.beta !== null ? h.beta.toFixed(2) : '-'],
+        [h.sharpe !== null ? h.sharpe.toFixed(2) : '-', ratioClass(h.sharpe)],
+        [h.sortino !== null ? h.sortino.toFixed(2) : '-', ratioClass(h.sortino)],
+    ]);
+}
+
+function holdingRows(holdings) {
+    const frag = document.createDocumentFragment();
+    holdings.forEach(h => frag.appendChild(holdingRow(h)));
+    return frag;
+}
+
+function renderHoldings() {
+    const body = EL.holdingsBody;
+    // Only the first page is rendered up front; the rest follow as the table scrolls
+    const frag = holdingRows(D.holdings.slice(0, HOLDINGS_PAGE_SIZE));
+
+    // Total row
+    const t = D.totals;
+    const totalRetPct = t.total_return_pct;
+    // Weighted avg metrics for totals row (computed server-side)
+    const {w_cagr, w_beta, w_sharpe, w_sortino} = t;
+
+    frag.appendChild(tableRow([
+        [strongText('TOTAL')],
+        ['-'], ['-'], ['-'], ['-'], ['-'],
+        ['$' + fmtB(t.total_investment)],
+        ['$' + fmtB(t.total_current_value)],
+        ['$' + fmtB(t.total_dividends)],
+        [totalRetPct.toFixed(1) + '%', signClass(totalRetPct)],
+        [w_cagr.toFixed(1) + '%', signClass(w_cagr)],
+        [w_beta.toFixed(2)],
+        [w_sharpe.toFixed(2)],
+        [w_sortino.toFixed(2)],
+    ], 'total-row'));
+    body.replaceChildren(frag);
+    if (D.holdings.length > HOLDINGS_PAGE_SIZE) observeMoreHoldings(body, HOLDINGS_PAGE_SIZE);
+}
+
+function observeMoreHoldings(body, shown) {
+    // A sentinel row above the total row pulls in the next page when it nears the viewport
+    const sentinel = document.createElement('tr');
+    body.insertBefore(sentinel, body.lastElementChild);
+    const observer = new IntersectionObserver(entries => {
+        if (!entries[0].isIntersecting) return;
+        const next = D.holdings.slice(shown, shown + HOLDINGS_PAGE_SIZE);
+        body.insertBefore(holdingRows(next), sentinel);
+        shown += next.length;
+        if (shown >= D.holdings.length) {
+            observer.disconnect();
+            sentinel.remove();
+        }
+    }, {root: body.closest('.table-scroll'), rootMargin: '200px'});
+    observer.observe(sentinel);
+}
+
+// ==================== INDEXED PERFORMANCE ====================
+// Line colour per ticker/index, shared by the performance and drawdown charts
+const SERIES_COLORS = {
+    THYAO:'#ff6384', TCELL:'#36a2eb', HALKB:'#ffce56', VAKBN:'#4bc0c0',
+    TTKOM:'#9966ff', TURSG:'#ff9f40', KRDMD:'#c9cbcf', TRALT:'#00ff88',
+    TRMET:'#ff4466', TRENJ:'#00d4ff', XU100:'#ffffff', XU30:'#888888', XBANK:'#aaaaaa'
+};
+// Doughnut slice colours, in sector order
+const SECTOR_COLORS = ['#ff6384','#36a2eb','#ffce56','#4bc0c0','#9966ff','#ff9f40','#00ff88'];
+
+// Series arrive filtered and downsampled as columnar {x: label indexes, y: values}; zip them once
+// into the {x, y} points Chart.js reads directly with parsing turned off
+function chartPoints(series) {
+    const points = new Array(series.x.length);
+    for (let i = 0; i < points.length; i++) points[i] = { x: series.x[i], y: series.y[i] };
+    return points;
+}
+
+let indexedChartInstance = null;
+function renderIndexedChart() {
+    const ctx = EL.indexedChart.getContext('2d');
+    const perf = D.indexed_performance;
+    // Separate THYAO (uses right Y axis) from others
+    const datasets = [];
+    const stocksToPlot = ['THYAO','TCELL','HALKB','VAKBN','TTKOM','TURSG','KRDMD','TRALT','TRMET','TRENJ','XU100'];
+
+    stocksToPlot.forEach(comp => {
+        if (!perf[comp]) return;
+        datasets.push({
+            label: comp,
+            data: chartPoints(perf[comp]),
+            borderColor: SERIES_COLORS[comp] || '#888',
+            borderWidth: comp === 'THYAO' ? 2.5 : 1.5,
+            pointRadius: 0,
+            tension: 0.1,
+            yAxisID: comp === 'THYAO' ? 'y1' : 'y',
+            borderDash: comp === 'XU100' ? [5, 3] : [],
+        });
+    });
+
+    // Re-renders swap the data into the existing chart instead of rebuilding it
+    if (indexedChartInstance) {
+        indexedChartInstance.data.labels = D.chart_dates;
+        indexedChartInstance.data.datasets = datasets;
+        indexedChartInstance.update('none');
+        return;
+    }
+
+    indexedChartInstance = new Chart(ctx, {
+        type: 'line',
+        data: { labels: D.chart_dates, datasets },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            // Points arrive sorted and in Chart.js' internal format, so skip parsing and scanning
+            parsing: false,
+            normalized: true,
+            spanGaps: true,
+            animation: false,
+            interaction: { mode: 'index', intersect: false },
+            plugins: {
+                legend: { position: 'top', labels: { color: '#8899aa', font: { size: 10 }, boxWidth: 12 } },
+                tooltip: { backgroundColor: '#1a2634', titleColor: '#00d4ff', bodyColor: '#e0e8f0', borderColor: '#2a3a4a', borderWidth: 1 }
+            },
+            scales: {
+                x: { type: 'category', ticks: { color: '#667788', maxTicksLimit: 10, font:{size:10} }, grid: { color: 'rgba(42,58,74,0.3)' } },
+                y: {
+                    position: 'left',
+                    title: { display: true, text: 'Others (Base 100)', color: '#8899aa' },
+                    ticks: { color: '#667788', font:{size:10} },
+                    grid: { color: 'rgba(42,58,74,0.3)' },
+                    min: 0, max: 350,
+                },
+                y1: {
+                    position: 'right',
+                    title: { display: true, text: 'THYAO (Base 100)', color: '#ff6384' },
+                    ticks: { color: '#ff6384', font:{size:10} },
+                    grid: { drawOnChartArea: false },
+                    min: 0, max: 700,
+                }
+            }
+        }
+    });
+}
+
+// ==================== DRAWDOWN ====================
+let drawdownChartInstance = null;
+function renderDrawdownChart() {
+    const ctx = EL.drawdownChart.getContext('2d');
+    const dd = D.drawdown;
+    const datasets = [];
+    Object.keys(dd).forEach(comp => {
+        const d = dd[comp];
+        datasets.push({
+            label: comp + ' (Max: ' + d.max_drawdown.toFixed(1) + '%)',
+            data: chartPoints(d),
+            borderColor: SERIES_COLORS[comp] || '#888',
+            borderWidth: 1.2,
+            pointRadius: 0,
+            tension: 0.1,
+            fill: false,
+        });
+    });
+
+    if (drawdownChartInstance) {
+        drawdownChartInstance.data.labels = D.chart_dates;
+        drawdownChartInstance.data.datasets = datasets;
+        drawdownChartInstance.update('none');
+        return;
+    }
+
+    drawdownChartInstance = new Chart(ctx, {
+        type: 'line',
+        data: { labels: D.chart_dates, datasets },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            // Points arrive sorted and in Chart.js' internal format, so skip parsing and scanning
+            parsing: false,
+            normalized: true,
+            spanGaps: true,
+            animation: false,
+            interaction: { mode: 'index', intersect: false },
+            plugins: {
+                legend: { position: 'top', labels: { color: '#8899aa', font: { size: 10 }, boxWidth: 12 } },
+                tooltip: { backgroundColor: '#1a2634', titleColor: '#00d4ff', bodyColor: '#e0e8f0' }
+            },
+            scales: {
+                x: { type: 'category', ticks: { color: '#667788', maxTicksLimit: 10, font:{size:10} }, grid: { color: 'rgba(42,58,74,0.3)' } },
+                y: { ticks: { color: '#667788', callback: v => v+'%', font:{size:10} }, grid: { color: 'rgba(42,58,74,0.3)' } }
+            }
+        }
+    });
+}
+
+// ==================== RISK DECOMPOSITION ====================
+let riskPieChartInstance = null;
+function renderRiskDecomposition() {
+    const risk = D.risk_decomposition;
+    // Pie chart by sector, from the weights aggregated server-side
+    const pieData = {
+        labels: risk.sectors.map(s => s.sector),
+        datasets: [{ data: risk.sectors.map(s => s.weight), backgroundColor: SECTOR_COLORS.slice(0, risk.sectors.length), borderColor: 'var(--bg-secondary)', borderWidth: 2 }]
+    };
+    if (riskPieChartInstance) {
+        riskPieChartInstance.data.labels = pieData.labels;
+        riskPieChartInstance.data.datasets = pieData.datasets;
+        riskPieChartInstance.update('none');
+    } else {
+        const ctx = EL.riskPieChart.getContext('2d');
+        riskPieChartInstance = new Chart(ctx, {
+            type: 'doughnut',
+            data: pieData,
+            options: {
+                responsive: true, maintainAspectRatio: false,
+                plugins: {
+                    legend: { position: 'right', labels: { color: '#8899aa', font: { size: 11 }, padding: 12 } },
+                    tooltip: { callbacks: { label: ctx => ctx.label + ': ' + ctx.parsed.toFixed(1) + '%' } }
+                }
+            }
+        });
+    }
+
+    // Table
+    const frag = document.createDocumentFragment();
+    risk.stocks.forEach(s => {
+        frag.appendChild(tableRow([
+            [strongText(s.ticker, 'var(--accent)')],
+            [s.sector],
+            [s.weight.toFixed(1) + '%'],
+            [s.beta !== null ? s.beta.toFixed(2) : '-'],
+            [s.std_dev !== null ? s.std_dev.toFixed(1) + '%' : '-'],
+            [s.vol_contribution.toFixed(2) + '%'],
+        ]));
+    });
+    EL.riskBody.replaceChildren(frag);
+}
+
+// ==================== KEY INSIGHTS ====================
+function renderInsights() {
+    const filters = EL.insightFilters;
+    const container = EL.insightsContainer;
+
+    // Build filter buttons: All, by sector, by company
+    // sector_summary is grouped server-side in first-appearance order, so no client-side dedupe
+    const sectors = D.sector_summary.map(s => s.sector);
+    let filterHtml = '<button class="filter-btn active" onclick="filterInsights(\'all\',this)">All</button>';
+    sectors.forEach(s => { filterHtml += `<button class="filter-btn" onclick="filterInsights('sector:${s}',this)">${s}</button>`; });
+    D.holdings.forEach(h => { filterHtml += `<button class="filter-btn" onclick="filterInsights('stock:${h.ticker}',this)">${h.ticker}</button>`; });
+    filters.innerHTML = filterHtml;
+
+    generateInsights('all');
+}
+
+// Bursts of filter clicks collapse into one render on the next frame
+let insightFrame = 0;
+function filterInsights(filter, btn) {
+    EL.insightFilters.querySelectorAll('.filter-btn').forEach(b => b.classList.remove('active'));
+    if (btn) btn.classList.add('active');
+    if (insightFrame) cancelAnimationFrame(insightFrame);
+    insightFrame = requestAnimationFrame(() => {
+        insightFrame = 0;
+        generateInsights(filter);
+    });
+}
+
+function generateInsights(filter) {
+    const container = EL.insightsContainer;
+
+    // Insights are computed server-side and tagged with ticker/sector; filtering just picks a subset
+    const sector = filter.startsWith('sector:') ? filter.slice(7) : null;
+    const ticker = filter.startsWith('stock:') ? filter.slice(6) : null;
+    const insights = D.insights.filter(i =>
+        sector !== null ? i.sector === sector :
+        ticker !== null ? i.ticker === ticker :
+        true);
+
+    if (insights.length === 0) {
+        insights.push({ type: '', title: 'No specific insights', text: 'No notable observations for the current filter selection.' });
+    }
+
+    const frag = document.createDocumentFragment();
+    insights.forEach(ins => frag.appendChild(insightCard(ins)));
+    container.replaceChildren(frag);
+}
+
+function insightCard(ins) {
+    const card = document.createElement('div');
+    card.className = ins.type ? 'insight-card ' + ins.type : 'insight-card';
+    const title = document.createElement('h4');
+    title.textContent = ins.title;
+    const text = document.createElement('p');
+    text.textContent = ins.text;
+    card.append(title, text);
+    return card;
+}
+
+// ==================== SETTINGS ====================
+function toggleSettings() {
+    EL.settingsPanel.classList.toggle('open');
+}
+function toggleCard(id) {
+    const el = document.getElementById(id);
+    el.style.display = el.style.display === 'none' ? '' : 'none';
+}
+function toggleDrawdown() {
+    const section = EL.drawdownSection;
+    section.style.display = EL.drawdownToggle.checked ? '' : 'none';
+}
+
+// ==================== CHATBOT ====================
+let chatInitialized = false;
+
+async function initChat() {
+    const apiKey = EL.chatApiKey.value;
+    const baseUrl = EL.chatProvider.value;
+    const model = EL.chatModel.value;
+    if (!apiKey) { addChatMsg('Please enter your API key.', 'system'); return; }
+
+    EL.chatStatus.innerHTML = '<span class="spinner"></span> Connecting...';
+
+    const systemPrompt = `You are a helpful financial assistant for Turkish stocks (BIST).
+Portfolio tickers: HALKB, TRENJ, TRMET, TRALT, TCELL, THYAO, TTKOM, TURSG, VAKBN, KRDMD
+To fetch data, use: {"function": "get_price", "parameters": {"ticker": "THYAO"}}
+Available functions: get_stock_info, get_price, get_historical_data, get_portfolio_summary, compare_stocks
+Provide clear analysis. This is not financial advice.`;
+
+    try {
+        const resp = await fetch('/api/initialize', {
+            method: 'POST',
+            headers: {'Content-Type':'application/json'},
+            body: JSON.stringify({ apiKey: apiKey, baseUrl: baseUrl, model: model, systemPrompt: systemPrompt })
+        });
+        const data = await resp.json();
+        if (data.success) {
+            chatInitialized = true;
+            EL.chatStatus.innerHTML = '<span style="color:var(--accent2)">Connected</span>';
+            addChatMsg('Chat connected! Ask about HALKB, TRENJ, TRMET, TRALT, TCELL, THYAO, TTKOM, TURSG, VAKBN, or KRDMD.', 'system');
+        } else {
+            EL.chatStatus.innerHTML = '<span style="color:var(--red)">Error</span>';
+            addChatMsg('Error: ' + data.error, 'system');
+        }
+    } catch(e) {
+        EL.chatStatus.innerHTML = '<span style="color:var(--red)">Failed</span>';
+        addChatMsg('Connection error: ' + e.message, 'system');
+    }
+}
+
+async function sendChat() {
+    const input = EL.chatInput;
+    const msg = input.value.trim();
+    if (!msg) return;
+    if (!chatInitialized) { addChatMsg('Please connect first by entering your API key and clicking Connect.', 'system'); return; }
+
+    addChatMsg(msg, 'user');
+    input.value = '';
+    addChatMsg('<span class="spinner"></span> Thinking...', 'system', true);
+
+    try {
+        const resp = await fetch('/api/chat', {
+            method: 'POST',
+            headers: {'Content-Type':'application/json', 'Accept':'text/event-stream'},
+            body: JSON.stringify({ message: msg })
+        });
+        // Errors and rate limits still come back as plain JSON
+        if (!(resp.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+            const data = await resp.json();
+            removeLastMsg();
+            addChatMsg(data.response, 'assistant');
+            return;
+        }
+        await readChatStream(resp);
+    } catch(e) {
+        removeLastMsg();
+        addChatMsg('Error: ' + e.message, 'system');
+    }
+}
+
+// Render 'token' events into one assistant bubble as they arrive; the 'done'
+// event swaps in the final answer, dropping any function-call JSON
+async function readChatStream(resp) {
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    const container = EL.chatMessages;
+    let div = null, buf = '';
+    const onEvent = (raw) => {
+        let event = 'message', data = '';
+        for (const line of raw.split('\n')) {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (!data) return;
+        const payload = JSON.parse(data);
+        if (!div) { removeLastMsg(); addChatMsg('', 'assistant'); div = container.lastChild; }
+        if (event === 'done') div.textContent = payload.response;
+        else div.textContent += payload.token;
+        container.scrollTop = container.scrollHeight;
+    };
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buf += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buf.indexOf('\n\n')) >= 0) {
+            onEvent(buf.slice(0, end));
+            buf = buf.slice(end + 2);
+        }
+    }
+    if (buf.trim()) onEvent(buf);
+}
+function addChatMsg(text, type, isHtml) {
+    const container = EL.chatMessages;
+    const div = document.createElement('div');
+    div.className = 'chat-msg ' + type;
+    if (isHtml) div.innerHTML = text; else div.textContent = text;
+    container.appendChild(div);
+    container.scrollTop = container.scrollHeight;
+}
+function removeLastMsg() {
+    const container = EL.chatMessages;
+    if (container.lastChild) container.removeChild(container.lastChild);
+}
+
+// ==================== GOOGLE SHEETS EXPORT ====================
+function exportToSheets() {
+    // The TSV (holdings plus a total row) is built server-side with the dashboard data
+    const tsv = D.export_tsv;
+
+    // Copy to clipboard
+    navigator.clipboard.writeText(tsv).then(() => {
+        // Open Google Sheets with paste instructions
+        const sheetsUrl = 'https://docs.google.com/spreadsheets/create';
+        const win = window.open(sheetsUrl, '_blank');
+        alert('Data copied to clipboard!\n\nA new Google Sheet will open.\nPress Ctrl+V (or Cmd+V) in cell A1 to paste the data.');
+    }).catch(() => {
+        // Fallback: download as TSV file
+        const blob = new Blob([tsv], {type: 'text/tab-separated-values'});
+        const url = URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = 'tvf_portfolio.tsv';
+        a.click();
+        URL.revokeObjectURL(url);
+        alert('TSV file downloaded. Open it in Google Sheets via File > Import.');
+    });
+}
+
+// ==================== HELPERS ====================
+// Same output as toLocaleString(), without building a new formatter per call
+const FMT_NUMBER = new Intl.NumberFormat();
+
+// Abbreviated amounts repeat across cards, rows and the totals footer; each is formatted once
+const FMT_AMOUNT_CACHE = new Map();
+function fmtB(n) {
+    let s = FMT_AMOUNT_CACHE.get(n);
+    if (s !== undefined) return s;
+    if (Math.abs(n) >= 1e9) s = (n/1e9).toFixed(2) + 'B';
+    else if (Math.abs(n) >= 1e6) s = (n/1e6).toFixed(1) + 'M';
+    else if (Math.abs(n) >= 1e3) s = (n/1e3).toFixed(0) + 'K';
+    else s = n.toFixed(0);
+    FMT_AMOUNT_CACHE.set(n, s);
+    return s;
+}
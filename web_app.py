@@ -3,31 +3,313 @@ Web Interface for Finance LLM Assistant
 A Flask-based web UI with comprehensive TVF Portfolio Dashboard
 """
 
-from flask import Flask, render_template_string, request, jsonify, session
+from flask import Flask, Response, request, jsonify, session, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.middleware.proxy_fix import ProxyFix
+from collections import OrderedDict
+from functools import partial, wraps
+import math
 import os
 import json
+import gzip
+import hashlib
+import queue
+import re
+import threading
+import time
+import numpy as np
 from dotenv import load_dotenv
 from yahoo_finance import YahooFinanceAPI, execute_api_call
-from llm_interface import FinanceLLM
 from portfolio_data import get_all_dashboard_data
 
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))
+# Development server settings for `python web_app.py`; gunicorn reads gunicorn.conf.py instead
+PORT = int(os.environ.get('PORT', 5000))
+DEBUG = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify and request.json use the fast encoder"""
+
+    # Int/date dict keys are stringified like the stdlib does, instead of falling back
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs):
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+        except TypeError:
+            # Anything orjson still rejects goes through the stdlib provider
+            return super().dumps(obj, **kwargs)
 
-assistants = {}
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _json_bytes(obj):
+    """Compact JSON bytes for the cached payloads, with the fastest available encoder"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=OrjsonProvider._OPTIONS)
+        except TypeError:
+            # Same escape hatch as OrjsonProvider.dumps
+            pass
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+
+app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+# A random per-process key would differ between gunicorn workers and break sessions
+app.secret_key = os.environ.get('SECRET_KEY')
+if not app.secret_key:
+    raise RuntimeError("SECRET_KEY must be set (see DEPLOY.md)")
+# Session cookies only travel over HTTPS; set SESSION_COOKIE_SECURE=false for plain-HTTP local runs
+app.config['SESSION_COOKIE_SECURE'] = os.environ.get('SESSION_COOKIE_SECURE', 'true').lower() == 'true'
+# Railway/Render put one reverse proxy in front of the app; without this remote_addr is the
+# proxy for every visitor and they would all share one rate-limit bucket. 0 disables it.
+PROXY_HOPS = int(os.environ.get('PROXY_HOPS', 1))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
+
+# Chat assistants by session id, least recently used first; each one holds its own history
+MAX_ASSISTANTS = int(os.environ.get('MAX_ASSISTANTS', 64))
+# Sessions idle for longer than this lose their assistant and must reconnect
+ASSISTANT_IDLE_SECONDS = int(os.environ.get('ASSISTANT_IDLE_SECONDS', 3600))
+assistants = OrderedDict()
+_assistants_lock = threading.Lock()
+# Token buckets per (route, 'address' or 'session', id) as (tokens, last refill), least recently used first
+CHAT_RATE_PER_MINUTE = int(os.environ.get('CHAT_RATE_PER_MINUTE', 10))
+# Shared by every session from one address, so opening more sessions does not multiply the chat quota
+CHAT_ADDRESS_RATE_PER_MINUTE = int(os.environ.get('CHAT_ADDRESS_RATE_PER_MINUTE', 30))
+INITIALIZE_RATE_PER_MINUTE = int(os.environ.get('INITIALIZE_RATE_PER_MINUTE', 3))
+MAX_RATE_BUCKETS = 4096
+_rate_buckets = OrderedDict()
+_rate_lock = threading.Lock()
+# YahooFinanceAPI holds no per-user state, so every session and route shares one
+yahoo_api = YahooFinanceAPI()
+# Function executor handed to FinanceLLM.chat; bound once since the API object is shared
+execute_function = partial(execute_api_call, yahoo_api)
+# Live portfolio quotes as (built at, (bytes, compressed bodies, etag)), reused for a short while
+PORTFOLIO_TTL_SECONDS = int(os.environ.get('PORTFOLIO_TTL_SECONDS', 20))
+_portfolio_json = None
+_portfolio_lock = threading.Lock()
 
 # Cache dashboard data (loaded once on startup)
 _dashboard_data = None
+# Dashboard JSON as (bytes, compressed bodies, etag), rebuilt after a refresh
+_dashboard_json = None
+# Wall-clock time _dashboard_json was built, sent as its Last-Modified
+_dashboard_built_at = None
+# Full /api/data JSON as (source data, (bytes, compressed bodies, etag)), built on first request
+_api_data_json = None
+_refresh_lock = threading.Lock()
+# Background refresher, one per worker process
+DASHBOARD_REFRESH_SECONDS = int(os.environ.get('DASHBOARD_REFRESH_SECONDS', 300))
+_refresher_pid = None
+# Rendered dashboard page shell, same tuple layout; it holds no data so it is built once
+_dashboard_page = None
 
 def get_cached_dashboard_data():
     global _dashboard_data
     if _dashboard_data is None:
-        _dashboard_data = get_all_dashboard_data()
+        with _refresh_lock:
+            # Concurrent cold-cache requests wait for the first build instead of each running their own
+            if _dashboard_data is None:
+                _dashboard_data = get_all_dashboard_data()
     return _dashboard_data
 
 
+def _precompress(body, brotli_quality=11):
+    """(body, {encoding: compressed body}, etag), best encoding first"""
+    encoded = {}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(body, quality=brotli_quality)
+    encoded['gzip'] = gzip.compress(body, 9)
+    return body, encoded, hashlib.md5(body).hexdigest()
+
+
+def _plot_points(dates, values):
+    """[date, value] pairs ready for Chart.js, skipping rows with no date or value"""
+    return [[d, v] for d, v in zip(dates, values) if d and v is not None]
+
+
+# Charts are about a thousand pixels wide; longer series are downsampled to this many points
+CHART_MAX_POINTS = 1000
+
+
+def _lttb(points, threshold=CHART_MAX_POINTS):
+    """Largest-Triangle-Three-Buckets downsampling of [x, y] pairs, keeping the first and last"""
+    n = len(points)
+    if n <= threshold or threshold < 3:
+        return points
+    # Points sit on a category axis, so their position is just their index
+    y = np.array([p[1] for p in points], dtype=float)
+    x = np.arange(n, dtype=float)
+    every = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Pick the point forming the largest triangle with the last kept point and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep.append(a)
+    keep.append(n - 1)
+    return [points[i] for i in keep]
+
+
+def _serialize_dashboard(data):
+    """Compact, precompressed JSON of the data the dashboard page renders"""
+    # Charts get ready-to-plot, downsampled points only; /api/data still serves the full series
+    perf = {
+        comp: _lttb(_plot_points(series['dates'], series['indexed']))
+        for comp, series in data['indexed_performance'].items()
+    }
+    drawdown = {
+        comp: _lttb(_plot_points(series['dates'], series['drawdown']))
+        for comp, series in data['drawdown'].items()
+    }
+    # Series keep different dates after downsampling, so both charts share one sorted category axis.
+    # Each series ships columnar: x holds label indexes, y the values, without per-point keys.
+    chart_dates = sorted({d for group in (perf, drawdown) for points in group.values() for d, _ in points})
+    position = {d: i for i, d in enumerate(chart_dates)}
+
+    def chart_series(points):
+        return {'x': [position[d] for d, _ in points], 'y': [v for _, v in points]}
+
+    payload = {
+        **data,
+        'indexed_performance': {comp: chart_series(points) for comp, points in perf.items()},
+        'drawdown': {
+            comp: {**chart_series(points), 'max_drawdown': data['drawdown'][comp]['max_drawdown']}
+            for comp, points in drawdown.items()
+        },
+        'chart_dates': chart_dates,
+    }
+    return _precompress(_json_bytes(payload))
+
+
+def get_cached_dashboard_json():
+    global _dashboard_json, _dashboard_built_at
+    if _dashboard_json is None:
+        data = get_cached_dashboard_data()
+        with _refresh_lock:
+            if _dashboard_json is None:
+                _dashboard_json, _dashboard_built_at = _serialize_dashboard(data), time.time()
+    return _dashboard_json
+
+
+def get_cached_api_data_json():
+    global _api_data_json
+    data = get_cached_dashboard_data()
+    cached = _api_data_json
+    # Tied to the data object it was built from, so a refresh invalidates it
+    if cached is None or cached[0] is not data:
+        # Built lazily on a request for a ~1 MB body, so trade some brotli ratio for speed
+        cached = _api_data_json = (data, _precompress(_json_bytes(data), brotli_quality=5))
+    return cached[1]
+
+
+def get_cached_portfolio_json():
+    """Quotes for the default portfolio, fetched from Yahoo at most once per PORTFOLIO_TTL_SECONDS"""
+    global _portfolio_json
+    cached = _portfolio_json
+    if cached is None or time.monotonic() - cached[0] >= PORTFOLIO_TTL_SECONDS:
+        with _portfolio_lock:
+            # Requests that queued behind the fetch reuse its result instead of fetching again
+            cached = _portfolio_json
+            if cached is None or time.monotonic() - cached[0] >= PORTFOLIO_TTL_SECONDS:
+                # This cache owns quote freshness: bypass the per-ticker cache so quotes are never older than the TTL
+                summary = yahoo_api.get_portfolio_summary(refresh=True)
+                cached = _portfolio_json = (time.monotonic(), _precompress(_json_bytes(summary), brotli_quality=5))
+    return cached[1]
+
+
+def refresh_dashboard_cache():
+    """Rebuild the dashboard data and JSON off to the side, then swap both in"""
+    global _dashboard_data, _dashboard_json, _dashboard_built_at
+    data = get_all_dashboard_data()
+    data_json = _serialize_dashboard(data)
+    with _refresh_lock:
+        _dashboard_data, _dashboard_json, _dashboard_built_at = data, data_json, time.time()
+    return data
+
+
+def _dashboard_refresher():
+    """Periodically pick up workbook changes so the cache never goes stale"""
+    while True:
+        time.sleep(DASHBOARD_REFRESH_SECONDS)
+        try:
+            # get_all_dashboard_data hands back the same object until the workbook changes
+            if get_all_dashboard_data() is not _dashboard_data:
+                refresh_dashboard_cache()
+        except Exception as e:
+            print(f"[WARN] Dashboard refresh failed: {e}")
+
+
+def _minify_html(html):
+    """Drop comments and indentation; line breaks stay so inline spacing renders the same"""
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    return re.sub(r'\s*\n\s*', '\n', html).strip()
+
+
+def get_cached_dashboard_page():
+    global _dashboard_page
+    if _dashboard_page is None:
+        html = _minify_html(_DASHBOARD_TEMPLATE.render(assets=ASSET_URLS))
+        _dashboard_page = _precompress(html.encode('utf-8'))
+    return _dashboard_page
+
+
+def precompressed_response(body, encoded, etag, mimetype, max_age=60, stale_while_revalidate=None,
+                           immutable=False, last_modified=None):
+    """Serve prebuilt bytes, in the best encoding the client accepts, with ETag revalidation"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        # Quality, not membership: 'br;q=0' explicitly refuses brotli
+        encoding = next((e for e in encoded if request.accept_encodings[e] > 0), None)
+        response = Response(encoded[encoding] if encoding else body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.vary.add('Accept-Encoding')
+    # Bodies are complete and sized up front (Werkzeug sets Content-Length), so nginx has nothing to gain by buffering
+    response.headers['X-Accel-Buffering'] = 'no'
+    cache_control = f'public, max-age={max_age}'
+    if stale_while_revalidate:
+        cache_control += f', stale-while-revalidate={stale_while_revalidate}'
+    if immutable:
+        cache_control += ', immutable'
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
 DASHBOARD_HTML = """
 <!DOCTYPE html>
 <html lang="en">
@@ -35,243 +317,14 @@ DASHBOARD_HTML = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>TVF Portfolio Dashboard</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chartjs-plugin-annotation@3.0.1/dist/chartjs-plugin-annotation.min.js"></script>
-    <style>
-        :root {
-            --bg-primary: #0f1923;
-            --bg-secondary: #1a2634;
-            --bg-card: #1e2d3d;
-            --bg-hover: #253545;
-            --accent: #00d4ff;
-            --accent2: #00ff88;
-            --red: #ff4466;
-            --orange: #ffaa33;
-            --text: #e0e8f0;
-            --text-muted: #8899aa;
-            --border: #2a3a4a;
-            --radius: 10px;
-        }
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', sans-serif;
-            background: var(--bg-primary);
-            color: var(--text);
-            min-height: 100vh;
-            font-size: 14px;
-        }
-        .dashboard { max-width: 1600px; margin: 0 auto; padding: 16px; }
-
-        /* Header */
-        .header {
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            padding: 16px 24px;
-            background: var(--bg-secondary);
-            border-radius: var(--radius);
-            margin-bottom: 16px;
-            border: 1px solid var(--border);
-        }
-        .header-left h1 { font-size: 1.5em; color: var(--accent); }
-        .header-left .subtitle { color: var(--text-muted); font-size: 0.85em; margin-top: 2px; }
-        .header-right { display: flex; gap: 20px; align-items: center; }
-        .header-stat { text-align: center; }
-        .header-stat .label { font-size: 0.7em; color: var(--text-muted); text-transform: uppercase; letter-spacing: 1px; }
-        .header-stat .value { font-size: 1.3em; font-weight: 700; color: var(--accent); }
-        .header-stat .value.green { color: var(--accent2); }
-        .settings-btn {
-            background: var(--bg-card);
-            border: 1px solid var(--border);
-            color: var(--text);
-            padding: 8px 14px;
-            border-radius: 6px;
-            cursor: pointer;
-            font-size: 0.85em;
-            transition: background 0.2s;
-        }
-        .settings-btn:hover { background: var(--bg-hover); }
-
-        /* Settings Panel */
-        .settings-panel {
-            display: none;
-            background: var(--bg-secondary);
-            border: 1px solid var(--border);
-            border-radius: var(--radius);
-            padding: 20px;
-            margin-bottom: 16px;
-        }
-        .settings-panel.open { display: block; }
-        .settings-panel h3 { color: var(--accent); margin-bottom: 12px; font-size: 1em; }
-        .settings-grid { display: flex; flex-wrap: wrap; gap: 16px; }
-        .setting-group { min-width: 200px; }
-        .setting-group label {
-            display: flex; align-items: center; gap: 8px; cursor: pointer;
-            padding: 4px 0; font-size: 0.85em; color: var(--text-muted);
-        }
-        .setting-group label:hover { color: var(--text); }
-        .setting-group input[type="checkbox"] { accent-color: var(--accent); }
-
-        /* Cards */
-        .cards-row {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-            gap: 12px;
-            margin-bottom: 16px;
-        }
-        .metric-card {
-            background: var(--bg-card);
-            border: 1px solid var(--border);
-            border-radius: var(--radius);
-            padding: 16px;
-            position: relative;
-            transition: transform 0.15s, box-shadow 0.15s;
-        }
-        .metric-card:hover { transform: translateY(-2px); box-shadow: 0 4px 16px rgba(0,0,0,0.3); }
-        .metric-card .card-label {
-            font-size: 0.7em; color: var(--text-muted); text-transform: uppercase;
-            letter-spacing: 1px; margin-bottom: 6px;
-            display: flex; align-items: center; gap: 6px;
-        }
-        .metric-card .card-value { font-size: 1.6em; font-weight: 700; }
-        .metric-card .card-sub { font-size: 0.8em; color: var(--text-muted); margin-top: 4px; }
-        .card-value.positive { color: var(--accent2); }
-        .card-value.negative { color: var(--red); }
-        .card-value.neutral { color: var(--accent); }
-
-        /* Info tooltip */
-        .info-icon {
-            display: inline-flex; align-items: center; justify-content: center;
-            width: 16px; height: 16px; border-radius: 50%;
-            background: var(--border); color: var(--text-muted);
-            font-size: 10px; cursor: help; font-style: italic; font-weight: bold;
-            position: relative;
-        }
-        .info-icon .tooltip {
-            display: none; position: absolute; bottom: 24px; left: 50%;
-            transform: translateX(-50%); background: #1a1a2e; border: 1px solid var(--accent);
-            border-radius: 8px; padding: 10px 14px; min-width: 260px; max-width: 350px;
-            font-size: 11px; color: var(--text); font-style: normal; font-weight: normal;
-            z-index: 1000; line-height: 1.5; box-shadow: 0 4px 20px rgba(0,0,0,0.5);
-            letter-spacing: normal; text-transform: none;
-        }
-        .info-icon:hover .tooltip { display: block; }
-
-        /* Section panels */
-        .section {
-            background: var(--bg-secondary);
-            border: 1px solid var(--border);
-            border-radius: var(--radius);
-            margin-bottom: 16px;
-            overflow: hidden;
-        }
-        .section-header {
-            display: flex; align-items: center; justify-content: space-between;
-            padding: 14px 20px; border-bottom: 1px solid var(--border);
-        }
-        .section-header h2 { font-size: 1em; color: var(--accent); }
-        .section-body { padding: 20px; }
-
-        /* Two-column layout */
-        .two-col { display: grid; grid-template-columns: 1fr 1fr; gap: 16px; }
-
-        /* Charts */
-        .chart-container { position: relative; width: 100%; height: 350px; }
-        .chart-container canvas { width: 100% !important; height: 100% !important; }
-
-        /* Table */
-        .data-table { width: 100%; border-collapse: collapse; font-size: 0.82em; }
-        .data-table th {
-            background: var(--bg-card); color: var(--text-muted); text-align: left;
-            padding: 10px 12px; font-weight: 600; text-transform: uppercase; font-size: 0.8em;
-            letter-spacing: 0.5px; border-bottom: 2px solid var(--border);
-            position: sticky; top: 0; z-index: 10;
-        }
-        .data-table td {
-            padding: 9px 12px; border-bottom: 1px solid var(--border);
-            white-space: nowrap;
-        }
-        .data-table tr:hover td { background: var(--bg-hover); }
-        .data-table .total-row td {
-            background: var(--bg-card); font-weight: 700; border-top: 2px solid var(--accent);
-            color: var(--accent);
-        }
-        .data-table .positive { color: var(--accent2); }
-        .data-table .negative { color: var(--red); }
-        .table-scroll { max-height: 500px; overflow: auto; }
-
-        /* Tabs */
-        .tab-bar { display: flex; gap: 4px; padding: 0 20px; background: var(--bg-card); }
-        .tab-btn {
-            padding: 10px 18px; background: none; border: none; border-bottom: 2px solid transparent;
-            color: var(--text-muted); cursor: pointer; font-size: 0.85em; transition: all 0.2s;
-        }
-        .tab-btn.active { color: var(--accent); border-bottom-color: var(--accent); }
-        .tab-btn:hover { color: var(--text); }
-        .tab-content { display: none; }
-        .tab-content.active { display: block; }
-
-        /* Filter bar */
-        .filter-bar { display: flex; gap: 8px; flex-wrap: wrap; margin-bottom: 16px; }
-        .filter-btn {
-            padding: 6px 14px; border-radius: 20px; font-size: 0.8em;
-            border: 1px solid var(--border); background: var(--bg-card);
-            color: var(--text-muted); cursor: pointer; transition: all 0.2s;
-        }
-        .filter-btn.active { background: var(--accent); color: var(--bg-primary); border-color: var(--accent); }
-        .filter-btn:hover { border-color: var(--accent); }
-
-        /* Insights */
-        .insight-card {
-            background: var(--bg-card); border-radius: 8px; padding: 14px;
-            margin-bottom: 10px; border-left: 3px solid var(--accent);
-        }
-        .insight-card.warning { border-left-color: var(--orange); }
-        .insight-card.success { border-left-color: var(--accent2); }
-        .insight-card.danger { border-left-color: var(--red); }
-        .insight-card h4 { font-size: 0.9em; margin-bottom: 6px; }
-        .insight-card p { font-size: 0.82em; color: var(--text-muted); line-height: 1.5; }
-
-        /* Chatbot */
-        .chat-panel { display: flex; flex-direction: column; height: 500px; }
-        .chat-config { padding: 12px 20px; border-bottom: 1px solid var(--border); display: flex; gap: 8px; align-items: center; flex-wrap: wrap; }
-        .chat-config input, .chat-config select {
-            padding: 7px 10px; border-radius: 6px; border: 1px solid var(--border);
-            background: var(--bg-card); color: var(--text); font-size: 0.85em;
-        }
-        .chat-config input:focus, .chat-config select:focus { outline: none; border-color: var(--accent); }
-        .chat-messages { flex: 1; padding: 16px; overflow-y: auto; }
-        .chat-msg { margin-bottom: 12px; padding: 10px 14px; border-radius: 10px; max-width: 85%; font-size: 0.88em; white-space: pre-wrap; line-height: 1.5; }
-        .chat-msg.user { background: var(--accent); color: var(--bg-primary); margin-left: auto; }
-        .chat-msg.assistant { background: var(--bg-card); }
-        .chat-msg.system { background: var(--bg-hover); color: var(--text-muted); text-align: center; max-width: 100%; font-size: 0.82em; }
-        .chat-input-row { padding: 12px 16px; border-top: 1px solid var(--border); display: flex; gap: 8px; }
-        .chat-input-row input { flex: 1; padding: 10px; border-radius: 6px; border: 1px solid var(--border); background: var(--bg-card); color: var(--text); }
-        .chat-input-row input:focus { outline: none; border-color: var(--accent); }
-        .send-btn { padding: 10px 20px; background: var(--accent); color: var(--bg-primary); border: none; border-radius: 6px; cursor: pointer; font-weight: 600; }
-        .send-btn:hover { opacity: 0.85; }
-
-        /* Export button */
-        .export-btn {
-            padding: 8px 16px; background: var(--accent2); color: var(--bg-primary);
-            border: none; border-radius: 6px; cursor: pointer; font-size: 0.82em; font-weight: 600;
-        }
-        .export-btn:hover { opacity: 0.85; }
-
-        /* Responsive */
-        @media (max-width: 1000px) {
-            .two-col { grid-template-columns: 1fr; }
-            .header { flex-direction: column; gap: 12px; text-align: center; }
-            .header-right { flex-wrap: wrap; justify-content: center; }
-        }
-        @media (max-width: 700px) {
-            .cards-row { grid-template-columns: repeat(2, 1fr); }
-        }
-
-        /* Spinner */
-        .spinner { display: inline-block; width: 16px; height: 16px; border: 2px solid var(--border); border-top-color: var(--accent); border-radius: 50%; animation: spin 0.6s linear infinite; }
-        @keyframes spin { to { transform: rotate(360deg); } }
-    </style>
+    {% if assets['chart.umd.min.js'] %}
+    <link rel="preload" as="script" href="/assets/{{ assets['chart.umd.min.js'] }}">
+    {% else %}
+    <link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>
+    <link rel="dns-prefetch" href="https://cdn.jsdelivr.net">
+    <link rel="preload" as="script" href="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js" crossorigin="anonymous">
+    {% endif %}
+    <link rel="stylesheet" href="/assets/{{ assets['dashboard.css'] }}">
 </head>
 <body>
 <div class="dashboard" id="app">
@@ -445,7 +498,7 @@ DASHBOARD_HTML = """
                 <div style="margin-bottom:16px">
                     <div class="chart-container" style="height:250px"><canvas id="riskPieChart"></canvas></div>
                 </div>
-                <div class="table-scroll" style="max-height:250px">
+                <div class="table-scroll render-when-visible" style="max-height:250px;contain-intrinsic-size:auto 250px">
                     <table class="data-table" id="riskTable">
                         <thead>
                             <tr><th>Ticker</th><th>Sector</th><th>Weight %</th><th>Beta</th><th>Std Dev %</th><th>Vol Contrib %</th></tr>
@@ -461,7 +514,7 @@ DASHBOARD_HTML = """
             </div>
             <div class="section-body">
                 <div class="filter-bar" id="insightFilters"></div>
-                <div id="insightsContainer"></div>
+                <div id="insightsContainer" class="render-when-visible"></div>
             </div>
         </div>
     </div>
@@ -494,562 +547,173 @@ DASHBOARD_HTML = """
 
 </div>
 
-<script>
-// ==================== DATA ====================
-const D = DASHBOARD_DATA_PLACEHOLDER;
-
-// ==================== INIT ====================
-document.addEventListener('DOMContentLoaded', () => {
-    renderHeader();
-    renderCards();
-    renderHoldings();
-    renderIndexedChart();
-    renderDrawdownChart();
-    renderRiskDecomposition();
-    renderInsights();
-});
-
-// ==================== HEADER ====================
-function renderHeader() {
-    const xu = D.xu100_usd;
-    document.getElementById('xu100Try').textContent = xu.xu100_try.toLocaleString();
-    document.getElementById('xu100Usd').textContent = xu.xu100_usd.toLocaleString();
-    document.getElementById('usdtry').textContent = xu.usdtry.toFixed(2);
-}
-
-// ==================== CARDS ====================
-function renderCards() {
-    const t = D.totals;
-    const retEl = document.getElementById('vReturn');
-    retEl.textContent = t.total_return_pct.toFixed(1) + '%';
-    retEl.className = 'card-value ' + (t.total_return_pct >= 0 ? 'positive' : 'negative');
-    document.getElementById('vReturnSub').textContent = 'Invested $' + fmtB(t.total_investment);
-
-    document.getElementById('vGain').textContent = '$' + fmtB(t.total_gain);
-    document.getElementById('vGainSub').textContent = 'Dividends: $' + fmtB(t.total_dividends);
-
-    // Weighted avg CAGR
-    let sumCW = 0, sumW = 0;
-    D.holdings.forEach(h => { sumCW += h.cagr * h.current_value; sumW += h.current_value; });
-    const avgCagr = sumW > 0 ? sumCW / sumW : 0;
-    const cagrEl = document.getElementById('vCAGR');
-    cagrEl.textContent = avgCagr.toFixed(1) + '%';
-    cagrEl.className = 'card-value ' + (avgCagr >= 0 ? 'positive' : 'negative');
-
-    const betaEl = document.getElementById('vBeta');
-    betaEl.textContent = t.portfolio_beta !== null ? t.portfolio_beta.toFixed(2) : 'N/A';
-
-    const sharpeEl = document.getElementById('vSharpe');
-    if (t.portfolio_sharpe !== null) {
-        sharpeEl.textContent = t.portfolio_sharpe.toFixed(2);
-        sharpeEl.className = 'card-value ' + (t.portfolio_sharpe >= 1 ? 'positive' : t.portfolio_sharpe >= 0 ? 'neutral' : 'negative');
-    }
-
-    const sortinoEl = document.getElementById('vSortino');
-    if (t.portfolio_sortino !== null) {
-        sortinoEl.textContent = t.portfolio_sortino.toFixed(2);
-        sortinoEl.className = 'card-value ' + (t.portfolio_sortino >= 1 ? 'positive' : t.portfolio_sortino >= 0 ? 'neutral' : 'negative');
-    }
-
-    document.getElementById('vStdDev').textContent = t.portfolio_std !== null ? t.portfolio_std.toFixed(1) + '%' : 'N/A';
-    document.getElementById('vHoldings').textContent = t.num_holdings;
-
-    const sectors = [...new Set(D.holdings.map(h => h.sector))];
-    document.getElementById('vSectors').textContent = sectors.length + ' sectors';
-}
-
-// ==================== HOLDINGS TABLE ====================
-function renderHoldings() {
-    const body = document.getElementById('holdingsBody');
-    let html = '';
-    D.holdings.forEach(h => {
-        html += `<tr>
-            <td><strong style="color:var(--accent)">${h.ticker}</strong></td>
-            <td>${h.sector}</td>
-            <td>${h.investment_date}</td>
-            <td>$${h.inv_price_usd.toFixed(3)}</td>
-            <td>$${h.cur_price_usd.toFixed(3)}</td>
-            <td>${h.shareholding_pct.toFixed(1)}%</td>
-            <td>$${fmtM(h.investment_amount)}</td>
-            <td>$${fmtM(h.current_value)}</td>
-            <td>$${fmtM(h.dividends_usd)}</td>
-            <td class="${h.total_return_with_div >= 0 ? 'positive' : 'negative'}">${h.total_return_with_div.toFixed(1)}%</td>
-            <td class="${h.cagr >= 0 ? 'positive' : 'negative'}">${h.cagr.toFixed(1)}%</td>
-            <td>${h.beta !== null ? h.beta.toFixed(2) : '-'}</td>
-            <td class="${(h.sharpe||0) >= 1 ? 'positive' : (h.sharpe||0) < 0 ? 'negative' : ''}">${h.sharpe !== null ? h.sharpe.toFixed(2) : '-'}</td>
-            <td class="${(h.sortino||0) >= 1 ? 'positive' : (h.sortino||0) < 0 ? 'negative' : ''}">${h.sortino !== null ? h.sortino.toFixed(2) : '-'}</td>
-        </tr>`;
-    });
-
-    // Total row
-    const t = D.totals;
-    const totalRetPct = t.total_return_pct;
-    // Weighted avg metrics for totals row
-    let wBeta=0,wSharpe=0,wSortino=0,wCagr=0,wSum=0;
-    D.holdings.forEach(h => {
-        const w = h.current_value;
-        wSum += w;
-        if(h.beta!==null) wBeta += h.beta*w;
-        if(h.sharpe!==null) wSharpe += h.sharpe*w;
-        if(h.sortino!==null) wSortino += h.sortino*w;
-        wCagr += h.cagr*w;
-    });
-
-    html += `<tr class="total-row">
-        <td><strong>TOTAL</strong></td>
-        <td>-</td><td>-</td><td>-</td><td>-</td><td>-</td>
-        <td>$${fmtM(t.total_investment)}</td>
-        <td>$${fmtM(t.total_current_value)}</td>
-        <td>$${fmtM(t.total_dividends)}</td>
-        <td class="${totalRetPct >= 0 ? 'positive' : 'negative'}">${totalRetPct.toFixed(1)}%</td>
-        <td class="${(wCagr/wSum) >= 0 ? 'positive' : 'negative'}">${(wCagr/wSum).toFixed(1)}%</td>
-        <td>${(wBeta/wSum).toFixed(2)}</td>
-        <td>${(wSharpe/wSum).toFixed(2)}</td>
-        <td>${(wSortino/wSum).toFixed(2)}</td>
-    </tr>`;
-    body.innerHTML = html;
-}
-
-// ==================== INDEXED PERFORMANCE ====================
-let indexedChartInstance = null;
-function renderIndexedChart() {
-    const ctx = document.getElementById('indexedChart').getContext('2d');
-    const perf = D.indexed_performance;
-    const colors = {
-        THYAO:'#ff6384', TCELL:'#36a2eb', HALKB:'#ffce56', VAKBN:'#4bc0c0',
-        TTKOM:'#9966ff', TURSG:'#ff9f40', KRDMD:'#c9cbcf', TRALT:'#00ff88',
-        TRMET:'#ff4466', TRENJ:'#00d4ff', XU100:'#ffffff', XU30:'#888888', XBANK:'#aaaaaa'
-    };
-
-    // Separate THYAO (uses right Y axis) from others
-    const datasets = [];
-    const stocksToPlot = ['THYAO','TCELL','HALKB','VAKBN','TTKOM','TURSG','KRDMD','TRALT','TRMET','TRENJ','XU100'];
-
-    stocksToPlot.forEach(comp => {
-        if (!perf[comp]) return;
-        const d = perf[comp];
-        const points = d.dates.map((dt, i) => ({x: dt, y: d.indexed[i]})).filter(p => p.x && p.y !== null);
-
-        datasets.push({
-            label: comp,
-            data: points,
-            borderColor: colors[comp] || '#888',
-            borderWidth: comp === 'THYAO' ? 2.5 : 1.5,
-            pointRadius: 0,
-            tension: 0.1,
-            yAxisID: comp === 'THYAO' ? 'y1' : 'y',
-            borderDash: comp === 'XU100' ? [5, 3] : [],
-        });
-    });
-
-    indexedChartInstance = new Chart(ctx, {
-        type: 'line',
-        data: { datasets },
-        options: {
-            responsive: true,
-            maintainAspectRatio: false,
-            interaction: { mode: 'index', intersect: false },
-            plugins: {
-                legend: { position: 'top', labels: { color: '#8899aa', font: { size: 10 }, boxWidth: 12 } },
-                tooltip: { backgroundColor: '#1a2634', titleColor: '#00d4ff', bodyColor: '#e0e8f0', borderColor: '#2a3a4a', borderWidth: 1 }
-            },
-            scales: {
-                x: { type: 'category', ticks: { color: '#667788', maxTicksLimit: 10, font:{size:10} }, grid: { color: 'rgba(42,58,74,0.3)' } },
-                y: {
-                    position: 'left',
-                    title: { display: true, text: 'Others (Base 100)', color: '#8899aa' },
-                    ticks: { color: '#667788', font:{size:10} },
-                    grid: { color: 'rgba(42,58,74,0.3)' },
-                    min: 0, max: 350,
-                },
-                y1: {
-                    position: 'right',
-                    title: { display: true, text: 'THYAO (Base 100)', color: '#ff6384' },
-                    ticks: { color: '#ff6384', font:{size:10} },
-                    grid: { drawOnChartArea: false },
-                    min: 0, max: 700,
-                }
-            }
-        }
-    });
-}
-
-// ==================== DRAWDOWN ====================
-let drawdownChartInstance = null;
-function renderDrawdownChart() {
-    const ctx = document.getElementById('drawdownChart').getContext('2d');
-    const dd = D.drawdown;
-    const colors = {
-        THYAO:'#ff6384', TCELL:'#36a2eb', HALKB:'#ffce56', VAKBN:'#4bc0c0',
-        TTKOM:'#9966ff', TURSG:'#ff9f40', KRDMD:'#c9cbcf', TRALT:'#00ff88',
-        TRMET:'#ff4466', TRENJ:'#00d4ff'
-    };
-
-    const datasets = [];
-    Object.keys(dd).forEach(comp => {
-        const d = dd[comp];
-        const points = d.dates.map((dt, i) => ({x: dt, y: d.drawdown[i]})).filter(p => p.x && p.y !== null);
-        datasets.push({
-            label: comp + ' (Max: ' + d.max_drawdown.toFixed(1) + '%)',
-            data: points,
-            borderColor: colors[comp] || '#888',
-            borderWidth: 1.2,
-            pointRadius: 0,
-            tension: 0.1,
-            fill: false,
-        });
-    });
-
-    drawdownChartInstance = new Chart(ctx, {
-        type: 'line',
-        data: { datasets },
-        options: {
-            responsive: true,
-            maintainAspectRatio: false,
-            interaction: { mode: 'index', intersect: false },
-            plugins: {
-                legend: { position: 'top', labels: { color: '#8899aa', font: { size: 10 }, boxWidth: 12 } },
-                tooltip: { backgroundColor: '#1a2634', titleColor: '#00d4ff', bodyColor: '#e0e8f0' }
-            },
-            scales: {
-                x: { type: 'category', ticks: { color: '#667788', maxTicksLimit: 10, font:{size:10} }, grid: { color: 'rgba(42,58,74,0.3)' } },
-                y: { ticks: { color: '#667788', callback: v => v+'%', font:{size:10} }, grid: { color: 'rgba(42,58,74,0.3)' } }
-            }
-        }
-    });
-}
-
-// ==================== RISK DECOMPOSITION ====================
-function renderRiskDecomposition() {
-    const risk = D.risk_decomposition;
-    // Pie chart by sector
-    const sectorData = {};
-    risk.stocks.forEach(s => {
-        if (!sectorData[s.sector]) sectorData[s.sector] = 0;
-        sectorData[s.sector] += s.weight;
-    });
-    const sectorColors = ['#ff6384','#36a2eb','#ffce56','#4bc0c0','#9966ff','#ff9f40','#00ff88'];
-    const ctx = document.getElementById('riskPieChart').getContext('2d');
-    new Chart(ctx, {
-        type: 'doughnut',
-        data: {
-            labels: Object.keys(sectorData),
-            datasets: [{ data: Object.values(sectorData), backgroundColor: sectorColors.slice(0, Object.keys(sectorData).length), borderColor: 'var(--bg-secondary)', borderWidth: 2 }]
-        },
-        options: {
-            responsive: true, maintainAspectRatio: false,
-            plugins: {
-                legend: { position: 'right', labels: { color: '#8899aa', font: { size: 11 }, padding: 12 } },
-                tooltip: { callbacks: { label: ctx => ctx.label + ': ' + ctx.parsed.toFixed(1) + '%' } }
-            }
-        }
-    });
-
-    // Table
-    const riskBody = document.getElementById('riskBody');
-    let html = '';
-    risk.stocks.forEach(s => {
-        html += `<tr>
-            <td><strong style="color:var(--accent)">${s.ticker}</strong></td>
-            <td>${s.sector}</td>
-            <td>${s.weight.toFixed(1)}%</td>
-            <td>${s.beta !== null ? s.beta.toFixed(2) : '-'}</td>
-            <td>${s.std_dev !== null ? s.std_dev.toFixed(1) + '%' : '-'}</td>
-            <td>${s.vol_contribution.toFixed(2)}%</td>
-        </tr>`;
-    });
-    riskBody.innerHTML = html;
-}
-
-// ==================== KEY INSIGHTS ====================
-function renderInsights() {
-    const filters = document.getElementById('insightFilters');
-    const container = document.getElementById('insightsContainer');
-
-    // Build filter buttons: All, by sector, by company
-    const sectors = [...new Set(D.holdings.map(h => h.sector))];
-    let filterHtml = '<button class="filter-btn active" onclick="filterInsights(\'all\',this)">All</button>';
-    sectors.forEach(s => { filterHtml += `<button class="filter-btn" onclick="filterInsights('sector:${s}',this)">${s}</button>`; });
-    D.holdings.forEach(h => { filterHtml += `<button class="filter-btn" onclick="filterInsights('stock:${h.ticker}',this)">${h.ticker}</button>`; });
-    filters.innerHTML = filterHtml;
-
-    generateInsights('all');
-}
-
-function filterInsights(filter, btn) {
-    document.querySelectorAll('.filter-btn').forEach(b => b.classList.remove('active'));
-    if (btn) btn.classList.add('active');
-    generateInsights(filter);
-}
-
-function generateInsights(filter) {
-    const container = document.getElementById('insightsContainer');
-    let insights = [];
-
-    const holdings = filter === 'all' ? D.holdings :
-        filter.startsWith('sector:') ? D.holdings.filter(h => h.sector === filter.split(':')[1]) :
-        filter.startsWith('stock:') ? D.holdings.filter(h => h.ticker === filter.split(':')[1]) :
-        D.holdings;
-
-    // Generate insights based on filtered holdings
-    holdings.forEach(h => {
-        // Top performers
-        if (h.total_return_with_div > 200) {
-            insights.push({ type: 'success', title: h.ticker + ' - Strong Performer',
-                text: `${h.ticker} has delivered ${h.total_return_with_div.toFixed(1)}% total return (USD) with a CAGR of ${h.cagr.toFixed(1)}%. ${h.dividends_usd > 0 ? 'Dividends contributed $' + fmtM(h.dividends_usd) + '.' : ''}`,
-                ticker: h.ticker, sector: h.sector });
-        }
-        // Underperformers
-        if (h.total_return_with_div < 0) {
-            insights.push({ type: 'danger', title: h.ticker + ' - Negative Return',
-                text: `${h.ticker} is down ${Math.abs(h.total_return_with_div).toFixed(1)}% in USD terms since investment on ${h.investment_date}. Consider reviewing the investment thesis.`,
-                ticker: h.ticker, sector: h.sector });
-        }
-        // High beta warning
-        if (h.beta !== null && h.beta > 1.15) {
-            insights.push({ type: 'warning', title: h.ticker + ' - High Beta (' + h.beta.toFixed(2) + ')',
-                text: `${h.ticker} has a beta of ${h.beta.toFixed(2)}, indicating higher sensitivity to market movements. This position amplifies both gains and losses relative to XU100.`,
-                ticker: h.ticker, sector: h.sector });
-        }
-        // Negative Sharpe
-        if (h.sharpe !== null && h.sharpe < 0) {
-            insights.push({ type: 'danger', title: h.ticker + ' - Negative Risk-Adjusted Return',
-                text: `${h.ticker} has a Sharpe ratio of ${h.sharpe.toFixed(2)}, indicating returns have not compensated for the risk taken. The 1Y USD return is ${h.return_1y !== null ? h.return_1y.toFixed(1) + '%' : 'N/A'}.`,
-                ticker: h.ticker, sector: h.sector });
-        }
-        // Excellent Sharpe
-        if (h.sharpe !== null && h.sharpe > 2) {
-            insights.push({ type: 'success', title: h.ticker + ' - Excellent Risk-Adjusted Return',
-                text: `${h.ticker} has a Sharpe ratio of ${h.sharpe.toFixed(2)}, well above the 1.0 threshold. Strong risk-adjusted performance.`,
-                ticker: h.ticker, sector: h.sector });
-        }
-    });
-
-    // Sector-level insights
-    if (filter === 'all' || filter.startsWith('sector:')) {
-        D.sector_summary.forEach(s => {
-            if (filter.startsWith('sector:') && s.sector !== filter.split(':')[1]) return;
-            const weight = (s.total_current_value / D.totals.total_current_value * 100);
-            if (weight > 30) {
-                insights.push({ type: 'warning', title: 'Sector Concentration: ' + s.sector,
-                    text: `${s.sector} represents ${weight.toFixed(1)}% of portfolio value (${s.stocks.join(', ')}). Consider diversification to reduce sector-specific risk.`,
-                    sector: s.sector });
-            }
-        });
-    }
-
-    // Portfolio level
-    if (filter === 'all') {
-        const t = D.totals;
-        if (t.portfolio_beta !== null && t.portfolio_beta > 1.05) {
-            insights.push({ type: 'warning', title: 'Portfolio Tilts Aggressive',
-                text: `Portfolio beta of ${t.portfolio_beta.toFixed(2)} indicates above-market risk. In a downturn, the portfolio is expected to decline more than XU100.` });
-        }
-        if (t.portfolio_sharpe !== null && t.portfolio_sharpe > 0.5) {
-            insights.push({ type: 'success', title: 'Positive Risk-Adjusted Returns',
-                text: `Portfolio Sharpe ratio of ${t.portfolio_sharpe.toFixed(2)} suggests adequate compensation for risk taken. Sortino of ${t.portfolio_sortino ? t.portfolio_sortino.toFixed(2) : 'N/A'} indicates limited downside deviation.` });
-        }
-    }
-
-    if (insights.length === 0) {
-        insights.push({ type: '', title: 'No specific insights', text: 'No notable observations for the current filter selection.' });
-    }
-
-    container.innerHTML = insights.map(ins =>
-        `<div class="insight-card ${ins.type}"><h4>${ins.title}</h4><p>${ins.text}</p></div>`
-    ).join('');
-}
-
-// ==================== SETTINGS ====================
-function toggleSettings() {
-    document.getElementById('settingsPanel').classList.toggle('open');
-}
-function toggleCard(id) {
-    const el = document.getElementById(id);
-    el.style.display = el.style.display === 'none' ? '' : 'none';
-}
-function toggleDrawdown() {
-    const section = document.getElementById('drawdownSection');
-    section.style.display = document.getElementById('drawdownToggle').checked ? '' : 'none';
-}
-
-// ==================== CHATBOT ====================
-let chatInitialized = false;
-
-async function initChat() {
-    const apiKey = document.getElementById('chatApiKey').value;
-    const baseUrl = document.getElementById('chatProvider').value;
-    const model = document.getElementById('chatModel').value;
-    if (!apiKey) { addChatMsg('Please enter your API key.', 'system'); return; }
-
-    document.getElementById('chatStatus').innerHTML = '<span class="spinner"></span> Connecting...';
-
-    const systemPrompt = `You are a helpful financial assistant for Turkish stocks (BIST).
-Portfolio tickers: HALKB, TRENJ, TRMET, TRALT, TCELL, THYAO, TTKOM, TURSG, VAKBN, KRDMD
-To fetch data, use: {"function": "get_price", "parameters": {"ticker": "THYAO"}}
-Available functions: get_stock_info, get_price, get_historical_data, get_portfolio_summary, compare_stocks
-Provide clear analysis. This is not financial advice.`;
-
-    try {
-        const resp = await fetch('/api/initialize', {
-            method: 'POST',
-            headers: {'Content-Type':'application/json'},
-            body: JSON.stringify({ apiKey: apiKey, baseUrl: baseUrl, model: model, systemPrompt: systemPrompt })
-        });
-        const data = await resp.json();
-        if (data.success) {
-            chatInitialized = true;
-            document.getElementById('chatStatus').innerHTML = '<span style="color:var(--accent2)">Connected</span>';
-            addChatMsg('Chat connected! Ask about HALKB, TRENJ, TRMET, TRALT, TCELL, THYAO, TTKOM, TURSG, VAKBN, or KRDMD.', 'system');
-        } else {
-            document.getElementById('chatStatus').innerHTML = '<span style="color:var(--red)">Error</span>';
-            addChatMsg('Error: ' + data.error, 'system');
-        }
-    } catch(e) {
-        document.getElementById('chatStatus').innerHTML = '<span style="color:var(--red)">Failed</span>';
-        addChatMsg('Connection error: ' + e.message, 'system');
-    }
-}
-
-async function sendChat() {
-    const input = document.getElementById('chatInput');
-    const msg = input.value.trim();
-    if (!msg) return;
-    if (!chatInitialized) { addChatMsg('Please connect first by entering your API key and clicking Connect.', 'system'); return; }
-
-    addChatMsg(msg, 'user');
-    input.value = '';
-    addChatMsg('<span class="spinner"></span> Thinking...', 'system', true);
-
-    try {
-        const resp = await fetch('/api/chat', {
-            method: 'POST',
-            headers: {'Content-Type':'application/json'},
-            body: JSON.stringify({ message: msg })
-        });
-        const data = await resp.json();
-        removeLastMsg();
-        addChatMsg(data.response, 'assistant');
-    } catch(e) {
-        removeLastMsg();
-        addChatMsg('Error: ' + e.message, 'system');
-    }
-}
-
-function addChatMsg(text, type, isHtml) {
-    const container = document.getElementById('chatMessages');
-    const div = document.createElement('div');
-    div.className = 'chat-msg ' + type;
-    if (isHtml) div.innerHTML = text; else div.textContent = text;
-    container.appendChild(div);
-    container.scrollTop = container.scrollHeight;
-}
-function removeLastMsg() {
-    const container = document.getElementById('chatMessages');
-    if (container.lastChild) container.removeChild(container.lastChild);
-}
-
-// ==================== GOOGLE SHEETS EXPORT ====================
-function exportToSheets() {
-    // Build CSV data for the holdings table
-    const headers = ['Ticker','Sector','Investment Date','Inv Price USD','Cur Price USD','TVF Share %',
-                     'Investment Amount','Current Value','Dividends','Return USD %','CAGR %','Beta','Sharpe','Sortino'];
-    let csv = headers.join('\\t') + '\\n';
-
-    D.holdings.forEach(h => {
-        csv += [h.ticker, h.sector, h.investment_date, h.inv_price_usd, h.cur_price_usd,
-                h.shareholding_pct, Math.round(h.investment_amount), Math.round(h.current_value),
-                Math.round(h.dividends_usd), h.total_return_with_div, h.cagr,
-                h.beta||'', h.sharpe||'', h.sortino||''].join('\\t') + '\\n';
-    });
-
-    // Total row
-    const t = D.totals;
-    csv += ['TOTAL','','','','','', Math.round(t.total_investment), Math.round(t.total_current_value),
-            Math.round(t.total_dividends), t.total_return_pct,
-            '', t.portfolio_beta||'', t.portfolio_sharpe||'', t.portfolio_sortino||''].join('\\t') + '\\n';
-
-    // Copy to clipboard
-    navigator.clipboard.writeText(csv).then(() => {
-        // Open Google Sheets with paste instructions
-        const sheetsUrl = 'https://docs.google.com/spreadsheets/create';
-        const win = window.open(sheetsUrl, '_blank');
-        alert('Data copied to clipboard!\\n\\nA new Google Sheet will open.\\nPress Ctrl+V (or Cmd+V) in cell A1 to paste the data.');
-    }).catch(() => {
-        // Fallback: download as TSV file
-        const blob = new Blob([csv], {type: 'text/tab-separated-values'});
-        const url = URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = 'tvf_portfolio.tsv';
-        a.click();
-        URL.revokeObjectURL(url);
-        alert('TSV file downloaded. Open it in Google Sheets via File > Import.');
-    });
-}
-
-// ==================== HELPERS ====================
-function fmtB(n) {
-    if (Math.abs(n) >= 1e9) return (n/1e9).toFixed(2) + 'B';
-    if (Math.abs(n) >= 1e6) return (n/1e6).toFixed(1) + 'M';
-    if (Math.abs(n) >= 1e3) return (n/1e3).toFixed(0) + 'K';
-    return n.toFixed(0);
-}
-function fmtM(n) {
-    if (Math.abs(n) >= 1e9) return (n/1e9).toFixed(2) + 'B';
-    if (Math.abs(n) >= 1e6) return (n/1e6).toFixed(1) + 'M';
-    if (Math.abs(n) >= 1e3) return (n/1e3).toFixed(0) + 'K';
-    return n.toFixed(0);
-}
-</script>
+<script defer src="/assets/{{ assets['dashboard.js'] }}"></script>
+{% if assets['chart.umd.min.js'] %}
+<script defer src="/assets/{{ assets['chart.umd.min.js'] }}"></script>
+{% else %}
+<script defer src="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js" crossorigin="anonymous"></script>
+{% endif %}
 </body>
 </html>
 """
 
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_MIMETYPES = {'.css': 'text/css', '.js': 'application/javascript'}
+# Served from /assets/ when a copy of Chart.js 4.4.1 is dropped into static/ (see DEPLOY.md),
+# saving the cross-origin connection to the CDN; otherwise the page loads it from jsDelivr
+CHART_JS_FILE = 'chart.umd.min.js'
+
+
+def _load_assets(names=('dashboard.css', 'dashboard.js'), vendored=(CHART_JS_FILE,)):
+    """
+    Read, minify and precompress the static assets under content-hashed names.
+    Vendored files are already minified and are skipped when not present.
+    """
+    assets, urls = {}, {}
+    for name in names + tuple(n for n in vendored if os.path.isfile(os.path.join(STATIC_DIR, n))):
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+            text = f.read()
+        stem, ext = os.path.splitext(name)
+        if ext == '.css' and rcssmin is not None:
+            text = rcssmin.cssmin(text)
+        elif ext == '.js' and rjsmin is not None and name not in vendored:
+            text = rjsmin.jsmin(text)
+        body, encoded, etag = _precompress(text.encode('utf-8'))
+        hashed = f'{stem}.{etag[:10]}{ext}'
+        assets[hashed] = (body, encoded, etag, ASSET_MIMETYPES[ext])
+        urls[name] = hashed
+    return assets, urls
+
+
+# Hashed name -> (bytes, compressed bodies, etag, mimetype); the hash changes whenever the file does
+_ASSETS, ASSET_URLS = _load_assets()
+
+# Compiled once at import; render_template_string would re-parse the template on every request
+_DASHBOARD_TEMPLATE = app.jinja_env.from_string(DASHBOARD_HTML)
+
+
+@app.before_request
+def start_dashboard_refresher():
+    # Threads do not survive gunicorn's fork, so each worker starts its own on first request
+    global _refresher_pid
+    if _refresher_pid != os.getpid():
+        with _refresh_lock:
+            if _refresher_pid != os.getpid():
+                _refresher_pid = os.getpid()
+                threading.Thread(target=_dashboard_refresher, daemon=True).start()
+
 
 @app.route('/')
 def index():
-    data = get_cached_dashboard_data()
-    # Inject data into HTML
-    data_json = json.dumps(data, default=str)
-    html = DASHBOARD_HTML.replace('DASHBOARD_DATA_PLACEHOLDER', data_json)
-    return render_template_string(html)
+    body, encoded, etag = get_cached_dashboard_page()
+    return precompressed_response(body, encoded, etag, 'text/html')
+
+
+@app.route('/api/dashboard.json')
+def dashboard_json():
+    body, encoded, etag = get_cached_dashboard_json()
+    # Repeat visits within a minute skip Flask entirely; after that a stale copy is shown while the
+    # ETag/Last-Modified revalidation runs, so an /api/refresh is visible within a few minutes at most
+    return precompressed_response(body, encoded, etag, 'application/json', max_age=60,
+                                  stale_while_revalidate=300, last_modified=_dashboard_built_at)
+
+
+@app.route('/assets/<name>')
+def asset(name):
+    if name not in _ASSETS:
+        return jsonify({'error': 'Not found'}), 404
+    body, encoded, etag, mimetype = _ASSETS[name]
+    # Names are content-hashed, so browsers can keep them for a year without revalidating
+    return precompressed_response(body, encoded, etag, mimetype, max_age=31536000, immutable=True)
 
 
 @app.route('/api/data')
 def api_data():
-    data = get_cached_dashboard_data()
-    return jsonify(data)
+    body, encoded, etag = get_cached_api_data_json()
+    return precompressed_response(body, encoded, etag, 'application/json')
 
 
 @app.route('/api/refresh')
 def api_refresh():
-    global _dashboard_data
-    _dashboard_data = None
-    data = get_cached_dashboard_data()
+    yahoo_api.clear_cache()
+    data = refresh_dashboard_cache()
     return jsonify({"status": "refreshed", "holdings": len(data["holdings"])})
 
 
+def _prune_assistants():
+    """Drop idle and over-limit assistants; call with _assistants_lock held"""
+    # Least recently used first, so idle entries are all at the front
+    cutoff = time.monotonic() - ASSISTANT_IDLE_SECONDS
+    while assistants and next(iter(assistants.values()))['last_used'] < cutoff:
+        assistants.popitem(last=False)
+    while len(assistants) > MAX_ASSISTANTS:
+        assistants.popitem(last=False)
+
+
+def rate_limited(per_address, per_session=None):
+    """Token-bucket limit per client address, and optionally per session, for routes that call the LLM provider"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limits = [((view.__name__, 'address', request.remote_addr), per_address)]
+            session_id = session.get('session_id')
+            if per_session and session_id:
+                limits.append(((view.__name__, 'session', session_id), per_session))
+            now = time.monotonic()
+            with _rate_lock:
+                levels = []
+                for key, rate in limits:
+                    tokens, last = _rate_buckets.pop(key, (rate, now))
+                    levels.append(min(rate, tokens + (now - last) * rate / 60))
+                # Spend from every bucket or from none, so a refused request costs nothing
+                allowed = all(tokens >= 1 for tokens in levels)
+                for (key, rate), tokens in zip(limits, levels):
+                    _rate_buckets[key] = (tokens - 1 if allowed else tokens, now)
+                while len(_rate_buckets) > MAX_RATE_BUCKETS:
+                    _rate_buckets.popitem(last=False)
+            if allowed:
+                return view(*args, **kwargs)
+            # Report the bucket that takes longest to refill
+            wait, per_minute = max(((1 - tokens) * 60 / rate, rate)
+                                   for (_, rate), tokens in zip(limits, levels) if tokens < 1)
+            message = 'Too many requests, please wait a moment and try again.'
+            # Both chat clients read this: initialize looks at success/error, chat at response
+            response = jsonify({'success': False, 'error': message, 'response': message})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(math.ceil(wait))
+            response.headers['RateLimit-Limit'] = str(per_minute)
+            response.headers['RateLimit-Remaining'] = '0'
+            return response
+        return wrapper
+    return decorator
+
+
 @app.route('/api/initialize', methods=['POST'])
+@rate_limited(INITIALIZE_RATE_PER_MINUTE)
 def initialize():
     data = request.json
-    session_id = session.get('session_id', os.urandom(16).hex())
+    session_id = session.get('session_id') or os.urandom(16).hex()
     session['session_id'] = session_id
 
     try:
-        api = YahooFinanceAPI()
+        # Imported on first use: the OpenAI SDK is the slowest import in the app
+        # and only chat needs it, so / and /health come up without it
+        from llm_interface import FinanceLLM
         llm = FinanceLLM(
             api_key=data['apiKey'],
             base_url=data['baseUrl'],
             model=data['model'],
             system_prompt=data['systemPrompt'],
-            available_functions=api.get_available_functions()
+            available_functions=yahoo_api.get_available_functions()
         )
 
-        assistants[session_id] = {
-            'api': api,
-            'llm': llm
-        }
+        with _assistants_lock:
+            assistants[session_id] = {
+                'llm': llm,
+                'last_used': time.monotonic()
+            }
+            assistants.move_to_end(session_id)
+            _prune_assistants()
 
         return jsonify({'success': True})
     except Exception as e:
@@ -1057,41 +721,90 @@ def initialize():
 
 
 @app.route('/api/chat', methods=['POST'])
+@rate_limited(CHAT_ADDRESS_RATE_PER_MINUTE, per_session=CHAT_RATE_PER_MINUTE)
 def chat():
     session_id = session.get('session_id')
-    if not session_id or session_id not in assistants:
+    with _assistants_lock:
+        _prune_assistants()
+        assistant = assistants.get(session_id) if session_id else None
+        if assistant is not None:
+            assistant['last_used'] = time.monotonic()
+            assistants.move_to_end(session_id)
+    if assistant is None:
         return jsonify({'response': 'Please initialize the chat first by clicking Connect.'})
 
-    assistant = assistants[session_id]
     message = request.json.get('message', '')
 
-    def executor(func_name, **kwargs):
-        return execute_api_call(assistant['api'], func_name, **kwargs)
+    if request.accept_mimetypes.best_match(['application/json', 'text/event-stream']) != 'text/event-stream':
+        response = assistant['llm'].chat(message, execute_function)
+        return jsonify({'response': response})
+
+    resp = Response(stream_with_context(chat_events(assistant['llm'], message, execute_function)),
+                    mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+def _sse(payload, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return prefix + "data: " + _json_bytes(payload).decode() + "\n\n"
 
-    response = assistant['llm'].chat(message, executor)
-    return jsonify({'response': response})
+
+def chat_events(llm, message, executor):
+    """
+    Yield Server-Sent Events for one chat turn: a 'token' event per streamed chunk,
+    then a 'done' event carrying the final answer (without any function-call JSON)
+    """
+    tokens = queue.Queue()
+    result = {}
+
+    def run():
+        try:
+            result['response'] = llm.chat(message, executor, on_token=tokens.put)
+        finally:
+            tokens.put(None)
+
+    threading.Thread(target=run, daemon=True).start()
+    while (token := tokens.get()) is not None:
+        yield _sse({'token': token})
+    yield _sse({'response': result.get('response', 'Error: no response')}, event='done')
 
 
 @app.route('/api/portfolio')
 def portfolio():
-    api = YahooFinanceAPI()
-    summary = api.get_portfolio_summary()
-    return jsonify(summary)
+    body, encoded, etag = get_cached_portfolio_json()
+    return precompressed_response(body, encoded, etag, 'application/json', max_age=PORTFOLIO_TTL_SECONDS)
+
+
+# Constant body for liveness probes. A fresh Response is still built per request,
+# since the session interface and WSGI server may mutate a shared one
+_HEALTH_BODY = b'{"status":"healthy"}'
 
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy'})
+    return Response(_HEALTH_BODY, mimetype='application/json', headers={'Cache-Control': 'no-store'})
 
 
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
+def warm_dashboard_cache():
+    """Build the dashboard caches now instead of on the first request"""
+    try:
+        get_cached_dashboard_json()
+        get_cached_dashboard_page()
+    except Exception as e:
+        print(f"[WARN] Dashboard data not preloaded: {e}")
 
+
+# Runs at import, so gunicorn --preload builds the caches once and workers share them
+warm_dashboard_cache()
+
+
+if __name__ == '__main__':
     print("\n" + "="*50)
     print("  TVF Portfolio Dashboard")
     print("="*50)
-    print(f"\nStarting server at http://localhost:{port}")
+    print(f"\nStarting server at http://localhost:{PORT}")
     print("Press Ctrl+C to stop\n")
 
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    app.run(host='0.0.0.0', port=PORT, debug=DEBUG)
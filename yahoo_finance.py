@@ -3,11 +3,94 @@ Yahoo Finance API Integration Module
 Fetches stock data for given tickers using yfinance library
 """
 
+import threading
+import time
 import yfinance as yf
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
 from typing import Optional
 from datetime import datetime, timedelta
 
 
+# Function descriptions advertised to the LLM (built once, shared by all instances)
+_AVAILABLE_FUNCTIONS = [
+    {
+        "name": "get_stock_info",
+        "description": "Get comprehensive information about a stock including price, volume, PE ratio, market cap, etc.",
+        "parameters": {"ticker": "Stock ticker symbol (e.g., 'THYAO' or 'THYAO.IS')"}
+    },
+    {
+        "name": "get_price",
+        "description": "Get current price and daily change for a stock",
+        "parameters": {"ticker": "Stock ticker symbol"}
+    },
+    {
+        "name": "get_historical_data",
+        "description": "Get historical price data for a stock",
+        "parameters": {
+            "ticker": "Stock ticker symbol",
+            "period": "Time period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max"
+        }
+    },
+    {
+        "name": "get_multiple_prices",
+        "description": "Get prices for multiple stocks at once",
+        "parameters": {"tickers": "List of ticker symbols (optional, uses default portfolio if not provided)"}
+    },
+    {
+        "name": "get_portfolio_summary",
+        "description": "Get summary of portfolio performance",
+        "parameters": {"tickers": "List of ticker symbols (optional)"}
+    },
+    {
+        "name": "compare_stocks",
+        "description": "Compare multiple stocks side by side",
+        "parameters": {"tickers": "List of ticker symbols to compare"}
+    }
+]
+
+
+# Successful lookups by (method, arguments) as (expires at, result), shared by every instance
+_RESPONSE_CACHE_MAXSIZE = 512
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+# Per-ticker lookups are blocking HTTP round trips, so multi-ticker calls overlap them on
+# one long-lived pool (map keeps input order) instead of paying N in a row
+_FETCH_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="yahoo")
+
+
+def _ttl_cached(ttl: float):
+    """Reuse a method's result for the same arguments for ttl seconds; errors are not cached
+
+    refresh=True skips the cached result and stores the fresh one in its place. Callers get
+    their own shallow copy, so a caller editing its dict cannot change what others are served.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, refresh=False):
+            key = (method.__name__, *args)
+            now = time.monotonic()
+            with _RESPONSE_CACHE_LOCK:
+                entry = None if refresh else _RESPONSE_CACHE.get(key)
+                if entry is not None and entry[0] > now:
+                    _RESPONSE_CACHE.move_to_end(key)
+                    return dict(entry[1])
+            result = method(self, *args)
+            if "error" not in result:
+                with _RESPONSE_CACHE_LOCK:
+                    _RESPONSE_CACHE[key] = (now + ttl, result)
+                    _RESPONSE_CACHE.move_to_end(key)
+                    if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAXSIZE:
+                        _RESPONSE_CACHE.popitem(last=False)
+                return dict(result)
+            return result
+        return wrapper
+    return decorator
+
+
 class YahooFinanceAPI:
     """Wrapper for Yahoo Finance API operations"""
 
@@ -26,8 +109,10 @@ class YahooFinanceAPI:
     ]
 
     @staticmethod
+    @lru_cache(maxsize=512)
     def convert_ticker(ticker: str) -> str:
         """Convert ticker to Yahoo Finance format (SYMBOL.IS)"""
+        # Memoized: the same handful of symbols is converted on every lookup
         # Remove common prefixes
         ticker = ticker.upper().strip()
         if ticker.startswith("IST:"):
@@ -42,7 +127,11 @@ class YahooFinanceAPI:
 
     def get_stock_info(self, ticker: str) -> dict:
         """Get comprehensive stock information"""
-        ticker = self.convert_ticker(ticker)
+        return self._get_stock_info(self.convert_ticker(ticker))
+
+    # Lookups are cached under the converted ticker, so 'thyao' and 'THYAO.IS' share an entry
+    @_ttl_cached(60)
+    def _get_stock_info(self, ticker: str) -> dict:
         try:
             stock = yf.Ticker(ticker)
             info = stock.info
@@ -69,19 +158,24 @@ class YahooFinanceAPI:
         except Exception as e:
             return {"ticker": ticker, "error": str(e)}
 
-    def get_price(self, ticker: str) -> dict:
-        """Get current price for a ticker"""
-        ticker = self.convert_ticker(ticker)
+    def get_price(self, ticker: str, refresh: bool = False) -> dict:
+        """Get current price for a ticker (refresh=True bypasses the 60s quote cache)"""
+        return self._get_price(self.convert_ticker(ticker), refresh=refresh)
+
+    @_ttl_cached(60)
+    def _get_price(self, ticker: str) -> dict:
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            price = info.get("currentPrice", info.get("regularMarketPrice", "N/A"))
-            prev_close = info.get("previousClose", 0)
+            # fast_info reads both prices from one chart request instead of downloading and
+            # parsing the whole quote summary behind .info (kept for get_stock_info)
+            fast = yf.Ticker(ticker).fast_info
+            price = fast.last_price
+            price = round(price, 2) if price is not None else "N/A"
+            prev_close = fast.regular_market_previous_close or 0
             change = ((price - prev_close) / prev_close * 100) if prev_close and price != "N/A" else "N/A"
             return {
                 "ticker": ticker,
                 "price": price,
-                "currency": info.get("currency", "TRY"),
+                "currency": fast.currency or "TRY",
                 "change_percent": round(change, 2) if change != "N/A" else "N/A"
             }
         except Exception as e:
@@ -92,50 +186,63 @@ class YahooFinanceAPI:
         Get historical price data
         period options: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
         """
-        ticker = self.convert_ticker(ticker)
+        return self._get_historical_data(self.convert_ticker(ticker), period)
+
+    @_ttl_cached(300)
+    def _get_historical_data(self, ticker: str, period: str) -> dict:
         try:
             stock = yf.Ticker(ticker)
             hist = stock.history(period=period)
             if hist.empty:
                 return {"ticker": ticker, "error": "No historical data available"}
 
-            data = []
-            for date, row in hist.iterrows():
-                data.append({
+            # Only the last 10 rows are returned, for brevity
+            recent = hist[["Open", "High", "Low", "Close", "Volume"]].tail(10)
+            data = [
+                {
                     "date": date.strftime("%Y-%m-%d"),
-                    "open": round(row["Open"], 2),
-                    "high": round(row["High"], 2),
-                    "low": round(row["Low"], 2),
-                    "close": round(row["Close"], 2),
-                    "volume": int(row["Volume"])
-                })
+                    "open": round(o, 2),
+                    "high": round(h, 2),
+                    "low": round(l, 2),
+                    "close": round(c, 2),
+                    "volume": int(v)
+                }
+                for date, o, h, l, c, v in recent.itertuples(name=None)
+            ]
             return {
                 "ticker": ticker,
                 "period": period,
-                "data_points": len(data),
-                "history": data[-10:] if len(data) > 10 else data  # Return last 10 for brevity
+                "data_points": len(hist),
+                "history": data
             }
         except Exception as e:
             return {"ticker": ticker, "error": str(e)}
 
+    @staticmethod
+    def clear_cache():
+        """Drop all cached Yahoo lookups"""
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE.clear()
+
     def get_multiple_prices(self, tickers: Optional[list] = None) -> list:
         """Get prices for multiple tickers"""
         if tickers is None:
             tickers = self.DEFAULT_TICKERS
-        return [self.get_price(t) for t in tickers]
+        return list(_FETCH_POOL.map(self.get_price, tickers))
 
-    def get_portfolio_summary(self, tickers: Optional[list] = None) -> dict:
-        """Get summary for a portfolio of stocks"""
+    def get_portfolio_summary(self, tickers: Optional[list] = None, refresh: bool = False) -> dict:
+        """Get summary for a portfolio of stocks (refresh=True fetches every quote anew)"""
         if tickers is None:
             tickers = self.DEFAULT_TICKERS
+        return self._summarize_prices(list(_FETCH_POOL.map(partial(self.get_price, refresh=refresh), tickers)))
 
-        stocks = []
+    @staticmethod
+    def _summarize_prices(stocks: list) -> dict:
+        """Count gainers and losers across get_price results"""
         total_gainers = 0
         total_losers = 0
 
-        for t in tickers:
-            data = self.get_price(t)
-            stocks.append(data)
+        for data in stocks:
             if "error" not in data and data.get("change_percent", 0) != "N/A":
                 if data["change_percent"] > 0:
                     total_gainers += 1
@@ -143,58 +250,20 @@ class YahooFinanceAPI:
                     total_losers += 1
 
         return {
-            "total_stocks": len(tickers),
+            "total_stocks": len(stocks),
             "gainers": total_gainers,
             "losers": total_losers,
-            "unchanged": len(tickers) - total_gainers - total_losers,
+            "unchanged": len(stocks) - total_gainers - total_losers,
             "stocks": stocks
         }
 
     def compare_stocks(self, tickers: list) -> dict:
         """Compare multiple stocks"""
-        comparison = []
-        for t in tickers:
-            info = self.get_stock_info(t)
-            comparison.append(info)
-        return {"comparison": comparison}
+        return {"comparison": list(_FETCH_POOL.map(self.get_stock_info, tickers))}
 
     def get_available_functions(self) -> list:
         """Return list of available API functions for the LLM"""
-        return [
-            {
-                "name": "get_stock_info",
-                "description": "Get comprehensive information about a stock including price, volume, PE ratio, market cap, etc.",
-                "parameters": {"ticker": "Stock ticker symbol (e.g., 'THYAO' or 'THYAO.IS')"}
-            },
-            {
-                "name": "get_price",
-                "description": "Get current price and daily change for a stock",
-                "parameters": {"ticker": "Stock ticker symbol"}
-            },
-            {
-                "name": "get_historical_data",
-                "description": "Get historical price data for a stock",
-                "parameters": {
-                    "ticker": "Stock ticker symbol",
-                    "period": "Time period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max"
-                }
-            },
-            {
-                "name": "get_multiple_prices",
-                "description": "Get prices for multiple stocks at once",
-                "parameters": {"tickers": "List of ticker symbols (optional, uses default portfolio if not provided)"}
-            },
-            {
-                "name": "get_portfolio_summary",
-                "description": "Get summary of portfolio performance",
-                "parameters": {"tickers": "List of ticker symbols (optional)"}
-            },
-            {
-                "name": "compare_stocks",
-                "description": "Compare multiple stocks side by side",
-                "parameters": {"tickers": "List of ticker symbols to compare"}
-            }
-        ]
+        return _AVAILABLE_FUNCTIONS
 
 
 # Function to execute API calls based on function name